@@ -7,22 +7,52 @@ for executing local Python tools including License Management and ReqIF Comparis
 """
 
 from flask import Flask, render_template, request, jsonify, send_file
+from flask.json.provider import JSONProvider
 import subprocess
 import os
+import sys
+import io
 import tempfile
 import json
 import logging
+import importlib
+import contextlib
+import traceback
+import threading
+import multiprocessing
+import queue
+import atexit
+import itertools
+from collections import deque
 from datetime import datetime
+import time
 import uuid
-from werkzeug.utils import secure_filename
 import zipfile
 import shutil
 
+try:
+    import orjson
+except ImportError:  # Fall back to Flask's stdlib-json provider
+    orjson = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class ORJSONProvider(JSONProvider):
+    """JSON provider backed by orjson, which is much faster on large tool outputs"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+if orjson is not None:
+    app.json = ORJSONProvider(app)
+# Keep every compiled template (the set is small and fixed); auto-reload stays tied to debug mode
+app.jinja_options = dict(app.jinja_options, cache_size=-1)
 app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 100MB max file size
 app.config['UPLOAD_FOLDER'] = tempfile.mkdtemp()
 
@@ -45,110 +75,447 @@ TOOLS_CONFIG = {
     }
 }
 
+# Resolve per-tool paths once instead of on every call
+for tool_config in TOOLS_CONFIG.values():
+    tool_config['script_path'] = os.fspath(tool_config['script_path'])
+    tool_config['venv_path'] = os.fspath(tool_config['venv_path'])
+    tool_config['cwd'] = os.path.dirname(tool_config['script_path'])
+
+# Number of pre-warmed worker processes kept per tool (0 disables the pools)
+TOOL_POOL_SIZE = int(os.environ.get('TOOL_POOL_SIZE', '2'))
+
+# Seconds a pooled job may take before it is abandoned and rerun as a subprocess
+TOOL_JOB_TIMEOUT = int(os.environ.get('TOOL_JOB_TIMEOUT', '600'))
+
+# Subprocess stderr is drained in fixed-size chunks (stdout goes straight to the output file)
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Buffer size for the userspace copy used when the kernel cannot copy an upload for us
+UPLOAD_COPY_BUFSIZE = 1024 * 1024
+
+# Signature at the start of every .reqifz (ZIP) archive
+ZIP_MAGIC = b'PK\x03\x04'
+
+# Uploads below this size are handed to the tools as anonymous in-memory files (Linux only)
+MEMFD_UPLOAD_LIMIT = 32 * 1024 * 1024
+
+# memfds are passed to the tools as /proc/<pid>/fd/<n> paths, which only Linux provides;
+# everywhere else inputs are staged in TempFileRing slots or UPLOAD_FOLDER instead
+MEMFD_STAGING = sys.platform.startswith('linux') and hasattr(os, 'memfd_create')
+
+# Request-handling threads for the production WSGI server
+WSGI_THREADS = int(os.environ.get('WSGI_THREADS', '8'))
+
 # Store execution history (in production, use a database)
-execution_history = []
+EXECUTION_HISTORY_SIZE = 1000
+execution_history = deque(maxlen=EXECUTION_HISTORY_SIZE)
+
+# Running totals kept alongside the bounded history so stats stay O(1)
+execution_stats = {'total': 0, 'successful': 0}
+execution_history_lock = threading.Lock()
+
+# Records in execution_history by id, for serving their spilled output
+execution_index = {}
+
+# Tool module imported once per pool worker by _init_tool_worker
+_tool_module = None
+_tool_import_error = None
+
+def _init_tool_worker(script_path, cwd):
+    """Pool initializer: import the tool module once so each job skips interpreter startup"""
+    global _tool_module, _tool_import_error
+    module_dir = os.path.dirname(script_path)
+    module_name = os.path.splitext(os.path.basename(script_path))[0]
+    try:
+        if module_dir not in sys.path:
+            sys.path.insert(0, module_dir)
+        # Same working directory as the subprocess fallback, so relative log/backup files land together
+        os.chdir(cwd)
+        
+        # Drop the app's inherited root handlers (and any copy of the tool imported before the fork)
+        # so the tool's own logging.basicConfig() installs its file and console handlers here
+        root_logger = logging.getLogger()
+        for handler in root_logger.handlers[:]:
+            root_logger.removeHandler(handler)
+        sys.modules.pop(module_name, None)
+        
+        _tool_module = importlib.import_module(module_name)
+    except Exception:
+        # Keep the worker alive and report the failure per job instead of respawning forever
+        _tool_import_error = traceback.format_exc()
+
+def _run_tool_job(args, output_path, input_bytes=None):
+    """Run the pre-imported tool's main() inside a pool worker, emulating argv/stdin/stdout"""
+    if _tool_module is None:
+        return {'returncode': 1, 'stderr': _tool_import_error or 'Tool module not loaded'}
+    
+    # stdout goes to the output file as it is produced; only stderr travels back to the app
+    stdout = open(output_path, 'w', encoding='utf-8', errors='replace')
+    stderr = io.StringIO()
+    saved_argv, saved_stdin = sys.argv, sys.stdin
+    sys.argv = [_tool_module.__file__] + list(args)
+    sys.stdin = io.TextIOWrapper(io.BytesIO(input_bytes or b''), encoding='utf-8')
+    returncode = 0
+    
+    # The tool's console log handlers hold the streams they were created with, which redirect_stdout
+    # cannot rebind; point them at the captured output for this job, keeping the tool's formatter
+    captured_streams = {id(sys.stdout): stdout, id(sys.stderr): stderr}
+    rebound_handlers = []
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, logging.StreamHandler) and not isinstance(handler, logging.FileHandler):
+            captured = captured_streams.get(id(handler.stream))
+            if captured is not None:
+                rebound_handlers.append((handler, handler.setStream(captured)))
+    
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                _tool_module.main()
+            except SystemExit as e:
+                if isinstance(e.code, int):
+                    returncode = e.code
+                elif e.code is not None:
+                    print(e.code, file=sys.stderr)
+                    returncode = 1
+            except EOFError:
+                # Interactive tools stop once the scripted stdin is exhausted
+                pass
+            except Exception:
+                traceback.print_exc()
+                returncode = 1
+    finally:
+        sys.argv, sys.stdin = saved_argv, saved_stdin
+        for handler, original_stream in rebound_handlers:
+            handler.setStream(original_stream)
+        stdout.close()
+    
+    return {'returncode': returncode, 'stderr': stderr.getvalue()}
+
+# One long-lived pool per tool, created by init_tool_pools before the server starts its threads
+_tool_pools = {}
+_tool_pools_lock = threading.Lock()
+
+def get_tool_pool(tool_id):
+    """Return the worker pool for a tool, or None when it must run as a subprocess"""
+    return _tool_pools.get(tool_id)
+
+def init_tool_pools():
+    """Pre-warm the worker pools for all configured tools (tools already set up are skipped)"""
+    if TOOL_POOL_SIZE <= 0:
+        return
+    
+    with _tool_pools_lock:
+        for tool_id, tool_config in TOOLS_CONFIG.items():
+            if _tool_pools.get(tool_id) is not None or not os.path.isfile(tool_config['script_path']):
+                continue
+            try:
+                _tool_pools[tool_id] = multiprocessing.Pool(
+                    processes=TOOL_POOL_SIZE,
+                    initializer=_init_tool_worker,
+                    initargs=(tool_config['script_path'], tool_config['cwd'])
+                )
+                logger.info(f"Started {TOOL_POOL_SIZE} workers for {tool_config['name']}")
+            except Exception as e:
+                logger.warning(f"Could not start worker pool for {tool_id}, using subprocesses: {e}")
+
+def zero_copy_save(file_storage, path):
+    """Persist an uploaded file, letting the kernel copy it when Werkzeug spooled it to disk"""
+    stream = file_storage.stream
+    stream.seek(0)
+    
+    with open(path, 'wb') as out:
+        try:
+            src_fd = stream.fileno()
+            size = os.fstat(src_fd).st_size
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            # In-memory upload (Werkzeug keeps small ones in a BytesIO): nothing for the kernel to copy from
+            if isinstance(stream, io.BytesIO):
+                out.write(stream.getbuffer())
+            else:
+                shutil.copyfileobj(stream, out, length=UPLOAD_COPY_BUFSIZE)
+            return
+        
+        dst_fd = out.fileno()
+        if size and hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(dst_fd, 0, size)
+            except OSError:
+                pass
+        
+        offset = 0
+        try:
+            while offset < size:
+                if hasattr(os, 'copy_file_range'):
+                    copied = os.copy_file_range(src_fd, dst_fd, size - offset, offset, offset)
+                elif hasattr(os, 'sendfile'):
+                    copied = os.sendfile(dst_fd, src_fd, offset, size - offset)
+                else:
+                    break
+                if not copied:
+                    break
+                offset += copied
+        except OSError as e:
+            logger.debug(f"Kernel copy unavailable for upload, using buffered copy: {e}")
+        
+        if offset < size:
+            out.seek(0)
+            out.truncate()
+            stream.seek(0)
+            shutil.copyfileobj(stream, out, length=UPLOAD_COPY_BUFSIZE)
+
+def is_zip_upload(file_storage):
+    """Check an upload's ZIP local-file-header signature without reading the rest of it"""
+    stream = file_storage.stream
+    stream.seek(0)
+    head = stream.read(4)
+    stream.seek(0)
+    return head == ZIP_MAGIC
+
+def upload_to_memfd(file_storage, name):
+    """Stage a small upload in a memfd and return (fd, path), or None to use the disk instead"""
+    if not MEMFD_STAGING:
+        return None
+    
+    stream = file_storage.stream
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    if size >= MEMFD_UPLOAD_LIMIT:
+        return None
+    
+    fd = os.memfd_create(name)
+    # Addressed through our own pid so pool workers and subprocesses can both open it
+    path = f"/proc/{os.getpid()}/fd/{fd}"
+    try:
+        zero_copy_save(file_storage, path)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd, path
+
+def stage_input(temp_slots, data, ring, name):
+    """Stage tool input in a memfd when available, else in a pooled temp file; returns its path"""
+    if MEMFD_STAGING:
+        fd = os.memfd_create(name)
+        temp_slots.callback(os.close, fd)
+        with open(fd, 'wb', closefd=False) as staged:
+            staged.write(data)
+        return f"/proc/{os.getpid()}/fd/{fd}"
+    
+    temp_file = temp_slots.enter_context(ring.slot())
+    temp_file.write(data)
+    temp_file.flush()
+    return temp_file.name
+
+class TempFileRing:
+    """Fixed set of temp files reused across requests instead of being created and unlinked"""
+    
+    def __init__(self, size, suffix):
+        self.size = size
+        self.suffix = suffix
+        self._slots = None
+        self._lock = threading.Lock()
+    
+    def _ensure_slots(self):
+        with self._lock:
+            if self._slots is None:
+                self._slots = queue.Queue()
+                for _ in range(self.size):
+                    self._slots.put(tempfile.NamedTemporaryFile(mode='w+b', suffix=self.suffix, delete=False))
+                atexit.register(self.close)
+        return self._slots
+    
+    @contextlib.contextmanager
+    def slot(self):
+        """Borrow an emptied temp file; blocks while all slots are in use"""
+        slots = self._ensure_slots()
+        temp_file = slots.get()
+        try:
+            temp_file.seek(0)
+            temp_file.truncate()
+            yield temp_file
+        finally:
+            slots.put(temp_file)
+    
+    def close(self):
+        """Close and remove all pooled temp files"""
+        if self._slots is None:
+            return
+        while not self._slots.empty():
+            temp_file = self._slots.get_nowait()
+            temp_file.close()
+            try:
+                os.unlink(temp_file.name)
+            except OSError:
+                pass
+
+# Reusable temp files for license-management inputs
+TEMP_FILE_RING_SIZE = 16
+config_file_ring = TempFileRing(TEMP_FILE_RING_SIZE, '.txt')
+user_file_ring = TempFileRing(TEMP_FILE_RING_SIZE, '.csv')
+
+# Menu keystrokes for each license-management action
+LICENSE_ACTION_INPUTS = {
+    "query": b"1\n",
+    "inactive": b"2\n",
+    "add": b"3\n",
+    "remove": b"4\n",
+    "switch": b"5\n",
+    "summary": b"6\n",
+    "apply": b"7\n",
+    "status": b"8\n"
+}
+LICENSE_EXIT_INPUT = b"9\n"
+LICENSE_ACTIONS_WITH_IDENTIFIERS = frozenset(("query", "add", "remove"))
 
 class ToolExecutor:
     """Handles execution of local Python tools"""
     
+    @staticmethod
+    def run_tool(tool_id, args, input_bytes=None):
+        """Run a tool on a pre-warmed pool worker, falling back to a fresh subprocess
+        
+        The tool's stdout is written straight to a file under UPLOAD_FOLDER; the returned
+        'output_path' is handed on to save_execution_record, which takes ownership of it.
+        """
+        pool = get_tool_pool(tool_id)
+        if pool is not None:
+            output_path = ToolExecutor.new_output_path()
+            try:
+                # A worker that dies mid-job never reports back, so this also bounds that case
+                result = pool.apply_async(_run_tool_job, (args, output_path, input_bytes)).get(timeout=TOOL_JOB_TIMEOUT)
+            except Exception as e:
+                logger.warning(f"Pooled run of {tool_id} failed ({e!r}), rerunning it as a subprocess")
+                ToolExecutor.discard_output(output_path)
+            else:
+                result['output_path'] = output_path
+                return result
+        
+        output_path = ToolExecutor.new_output_path()
+        try:
+            tool_config = TOOLS_CONFIG[tool_id]
+            cmd = [tool_config['venv_path'], tool_config['script_path']] + list(args)
+            
+            with open(output_path, 'wb') as stdout_file:
+                process = subprocess.Popen(
+                    cmd,
+                    stdin=subprocess.PIPE if input_bytes is not None else None,
+                    stdout=stdout_file,
+                    stderr=subprocess.PIPE,
+                    bufsize=STREAM_CHUNK_SIZE,
+                    cwd=tool_config['cwd'],
+                    env=dict(os.environ, PYTHONIOENCODING='utf-8')
+                )
+                stderr = ToolExecutor.stream_output(process, input_bytes)
+            return {'returncode': process.returncode, 'output_path': output_path, 'stderr': stderr}
+        except BaseException:
+            ToolExecutor.discard_output(output_path)
+            raise
+    
+    @staticmethod
+    def new_output_path():
+        """Fresh path under UPLOAD_FOLDER for a tool run's stdout"""
+        return os.path.join(app.config['UPLOAD_FOLDER'], f"{uuid.uuid4().hex}.run")
+    
+    @staticmethod
+    def discard_output(output_path):
+        """Remove the output file of a run that is being abandoned"""
+        try:
+            os.unlink(output_path)
+        except OSError:
+            pass
+    
+    @staticmethod
+    def stream_output(process, input_bytes=None):
+        """Feed stdin and drain stderr chunk by chunk while the tool writes stdout to its file"""
+        stderr_chunks = []
+        
+        def feed_stdin():
+            try:
+                process.stdin.write(input_bytes)
+            except BrokenPipeError:
+                pass
+            finally:
+                process.stdin.close()
+        
+        # stdin gets its own thread so a full stderr pipe can never deadlock the writer
+        feeder = None
+        if input_bytes is not None:
+            feeder = threading.Thread(target=feed_stdin, daemon=True)
+            feeder.start()
+        
+        for chunk in iter(lambda: process.stderr.read(STREAM_CHUNK_SIZE), b''):
+            stderr_chunks.append(chunk)
+        process.wait()
+        if feeder is not None:
+            feeder.join()
+        
+        return ToolExecutor.decode_output(b''.join(stderr_chunks))
+    
+    @staticmethod
+    def decode_output(data):
+        """Decode raw pipe bytes in one pass, normalising newlines as text mode used to"""
+        text = data.decode('utf-8', errors='replace')
+        if os.linesep != '\n':
+            text = text.replace(os.linesep, '\n')
+        return text
+    
     @staticmethod
     def execute_license_management(license_config, user_file=None, action="query", user_identifiers=""):
         """Execute the license management tool"""
         try:
-            # Create temporary files
-            temp_files = []
-            
-            # Save license config to temp file
-            config_file = tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False)
-            config_file.write(license_config)
-            config_file.close()
-            temp_files.append(config_file.name)
-            
-            # Save user file if provided
-            user_file_path = None
-            if user_file:
-                user_file_path = tempfile.NamedTemporaryFile(mode='w+b', suffix='.csv', delete=False)
-                user_file.save(user_file_path.name)
-                user_file_path.close()
-                temp_files.append(user_file_path.name)
-                user_file_path = user_file_path.name
-            
-            # Build command
-            cmd = [
-                TOOLS_CONFIG['license_management']['venv_path'],
-                TOOLS_CONFIG['license_management']['script_path']
-            ]
-            
-            # Execute the tool
-            process = subprocess.Popen(
-                cmd,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                cwd=os.path.dirname(TOOLS_CONFIG['license_management']['script_path'])
-            )
-            
-            # Prepare input for the tool
-            input_data = []
-            
-            # Database connection (n for no)
-            input_data.append("n\n")
-            
-            # Load users from file
-            if user_file_path:
-                input_data.append("y\n")  # Load from file
-                input_data.append(f'"{user_file_path}"\n')
-            else:
-                input_data.append("n\n")  # Don't load from file
-            
-            # License configuration
-            input_data.append("paste\n")
-            input_data.append(license_config + "\n")
-            input_data.append("\x1a\n")  # Ctrl+Z to end paste
-            
-            # Select action
-            action_map = {
-                "query": "1",
-                "inactive": "2", 
-                "add": "3",
-                "remove": "4",
-                "switch": "5",
-                "summary": "6",
-                "apply": "7",
-                "status": "8",
-                "exit": "9"
-            }
-            input_data.append(f"{action_map.get(action, '1')}\n")
-            
-            # Add user identifiers if needed
-            if user_identifiers and action in ["query", "add", "remove"]:
-                input_data.append(f"{user_identifiers}\n")
-            
-            # Exit
-            input_data.append("9\n")
-            
-            # Send input and get output
-            input_text = "".join(input_data)
-            stdout, stderr = process.communicate(input=input_text)
-            
-            # Clean up temp files
-            for temp_file in temp_files:
-                try:
-                    os.unlink(temp_file)
-                except:
-                    pass
+            with contextlib.ExitStack() as temp_slots:
+                # Hand the license config to the tool as a file instead of pasting it through stdin
+                if license_config:
+                    config_path = stage_input(temp_slots, license_config.encode('utf-8'), config_file_ring, 'licfg')
+                else:
+                    config_path = os.devnull  # Nothing to stage for an empty configuration
+                args = ['--config-file', config_path]
+                
+                # Save user file if provided
+                if user_file:
+                    staged = upload_to_memfd(user_file, 'users')
+                    if staged:
+                        fd, user_file_path = staged
+                        temp_slots.callback(os.close, fd)
+                    else:
+                        user_slot = temp_slots.enter_context(user_file_ring.slot())
+                        zero_copy_save(user_file, user_slot.name)
+                        user_file_path = user_slot.name
+                    args += ['--users-file', user_file_path]
+                
+                # Prepare input for the tool (users and config are passed as arguments)
+                input_data = io.BytesIO()
+                
+                # Database connection (n for no) when no user file is given
+                if not user_file:
+                    input_data.write(b"n\n")
+                    input_data.write(b"n\n")  # Don't load from file
+                
+                # Select action (exit needs no dispatch, the final exit below covers it)
+                if action != 'exit':
+                    input_data.write(LICENSE_ACTION_INPUTS.get(action, LICENSE_ACTION_INPUTS['query']))
+                    
+                    # Add user identifiers if needed
+                    if user_identifiers and action in LICENSE_ACTIONS_WITH_IDENTIFIERS:
+                        input_data.write(f"{user_identifiers}\n".encode('utf-8'))
+                
+                # Exit
+                input_data.write(LICENSE_EXIT_INPUT)
+                
+                # Send input and get output
+                process = ToolExecutor.run_tool('license_management', args, input_data.getvalue())
+                stderr = process['stderr']
             
-            if process.returncode == 0:
+            if process['returncode'] == 0:
                 return {
                     'success': True,
-                    'output': stdout,
+                    'output_path': process['output_path'],
                     'error': stderr if stderr else None
                 }
             else:
                 return {
                     'success': False,
-                    'output': stdout,
+                    'output_path': process['output_path'],
                     'error': stderr
                 }
                 
@@ -156,7 +523,7 @@ class ToolExecutor:
             logger.error(f"Error executing license management tool: {e}")
             return {
                 'success': False,
-                'output': '',
+                'output_path': None,
                 'error': str(e)
             }
     
@@ -164,40 +531,27 @@ class ToolExecutor:
     def execute_reqif_comparison(file1_path, file2_path):
         """Execute the ReqIF comparison tool"""
         try:
-            # Build command
-            cmd = [
-                TOOLS_CONFIG['reqif_comparison']['venv_path'],
-                TOOLS_CONFIG['reqif_comparison']['script_path'],
-                file1_path,
-                file2_path
-            ]
-            
             # Execute the tool
-            process = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                cwd=os.path.dirname(TOOLS_CONFIG['reqif_comparison']['script_path'])
-            )
+            process = ToolExecutor.run_tool('reqif_comparison', [file1_path, file2_path])
             
-            if process.returncode == 0:
+            if process['returncode'] == 0:
                 return {
                     'success': True,
-                    'output': process.stdout,
-                    'error': process.stderr if process.stderr else None
+                    'output_path': process['output_path'],
+                    'error': process['stderr'] if process['stderr'] else None
                 }
             else:
                 return {
                     'success': False,
-                    'output': process.stdout,
-                    'error': process.stderr
+                    'output_path': process['output_path'],
+                    'error': process['stderr']
                 }
                 
         except Exception as e:
             logger.error(f"Error executing ReqIF comparison tool: {e}")
             return {
                 'success': False,
-                'output': '',
+                'output_path': None,
                 'error': str(e)
             }
     
@@ -206,10 +560,8 @@ class ToolExecutor:
                                      filter_user=None, date_range=None, top_percentile=0.1):
         """Execute the User Activity Analyzer tool"""
         try:
-            # Build command
-            cmd = [
-                TOOLS_CONFIG['user_activity_analyzer']['venv_path'],
-                TOOLS_CONFIG['user_activity_analyzer']['script_path'],
+            # Build arguments
+            args = [
                 '--log-file', log_file_path,
                 '--output-format', output_format,
                 '--sort-by', sort_by,
@@ -218,55 +570,87 @@ class ToolExecutor:
             
             # Add optional parameters
             if limit:
-                cmd.extend(['--limit', str(limit)])
+                args.extend(['--limit', str(limit)])
             if filter_user:
-                cmd.extend(['--filter-user', filter_user])
+                args.extend(['--filter-user', filter_user])
             if date_range and len(date_range) == 2:
-                cmd.extend(['--date-range', date_range[0], date_range[1]])
+                args.extend(['--date-range', date_range[0], date_range[1]])
             
             # Execute the tool
-            process = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                cwd=os.path.dirname(TOOLS_CONFIG['user_activity_analyzer']['script_path'])
-            )
+            process = ToolExecutor.run_tool('user_activity_analyzer', args)
             
-            if process.returncode == 0:
+            if process['returncode'] == 0:
                 return {
                     'success': True,
-                    'output': process.stdout,
-                    'error': process.stderr if process.stderr else None
+                    'output_path': process['output_path'],
+                    'error': process['stderr'] if process['stderr'] else None
                 }
             else:
                 return {
                     'success': False,
-                    'output': process.stdout,
-                    'error': process.stderr
+                    'output_path': process['output_path'],
+                    'error': process['stderr']
                 }
                 
         except Exception as e:
             logger.error(f"Error executing User Activity Analyzer tool: {e}")
             return {
                 'success': False,
-                'output': '',
+                'output_path': None,
                 'error': str(e)
             }
 
-def save_execution_record(tool_name, status, input_params, output_result, duration):
-    """Save execution record to history"""
+def execution_output_path(execution_id):
+    """Path of the file holding an execution's full tool output"""
+    return os.path.join(app.config['UPLOAD_FOLDER'], f"{execution_id}.out")
+
+def save_execution_record(tool_name, status, input_params, output_path, duration):
+    """Save execution record to history, taking over the tool's output file"""
+    execution_id = str(uuid.uuid4())
+    record_output_path = execution_output_path(execution_id)
+    if output_path:
+        os.replace(output_path, record_output_path)
+    else:
+        # The tool never ran; keep an empty output so the record can still be served
+        open(record_output_path, 'wb').close()
+    output_size = os.path.getsize(record_output_path)
+    
     record = {
-        'id': str(uuid.uuid4()),
+        'id': execution_id,
         'tool_name': tool_name,
         'execution_time': datetime.now().isoformat(),
         'status': status,
         'input_params': input_params,
-        'output_result': output_result,
+        'output_size': output_size,
         'duration_seconds': duration
     }
-    execution_history.append(record)
+    with execution_history_lock:
+        if len(execution_history) == execution_history.maxlen:
+            # Drop the output of the record the deque is about to evict
+            evicted = execution_history.popleft()
+            execution_index.pop(evicted['id'], None)
+            try:
+                os.unlink(execution_output_path(evicted['id']))
+            except OSError:
+                pass
+        execution_history.append(record)
+        execution_index[execution_id] = record
+        execution_stats['total'] += 1
+        if status == 'completed':
+            execution_stats['successful'] += 1
     return record
 
+# Page templates compiled once at import instead of on first request
+PAGE_TEMPLATES = (
+    'dashboard.html',
+    'license_management.html',
+    'reqif_comparison.html',
+    'user_activity_analyzer.html',
+    'help.html'
+)
+for template_name in PAGE_TEMPLATES:
+    app.jinja_env.get_template(template_name)
+
 @app.route('/')
 def dashboard():
     """Main dashboard page"""
@@ -306,7 +690,7 @@ def api_execute_license_management():
         if 'user_file' in request.files:
             user_file = request.files['user_file']
         
-        start_time = datetime.now()
+        start_ns = time.perf_counter_ns()
         
         # Execute the tool
         result = ToolExecutor.execute_license_management(
@@ -316,7 +700,7 @@ def api_execute_license_management():
             user_identifiers=user_identifiers
         )
         
-        duration = (datetime.now() - start_time).total_seconds()
+        duration = (time.perf_counter_ns() - start_ns) / 1e9
         
         # Save execution record
         execution_record = save_execution_record(
@@ -328,13 +712,13 @@ def api_execute_license_management():
                 'has_user_file': bool(user_file),
                 'user_identifiers': user_identifiers
             },
-            output_result=result['output'],
+            output_path=result['output_path'],
             duration=duration
         )
         
         return jsonify({
             'success': result['success'],
-            'output': result['output'],
+            'output_url': f"/api/output/{execution_record['id']}",
             'error': result['error'],
             'execution_id': execution_record['id'],
             'duration': duration
@@ -360,33 +744,45 @@ def api_execute_reqif_comparison():
         file1 = request.files['file1']
         file2 = request.files['file2']
         
-        # Validate file types
-        if not file1.filename.endswith('.reqifz') or not file2.filename.endswith('.reqifz'):
+        # Validate file types by content before anything is staged
+        if not is_zip_upload(file1) or not is_zip_upload(file2):
             return jsonify({
                 'success': False,
                 'error': 'Both files must be .reqifz format'
             }), 400
         
-        # Save files temporarily
-        file1_path = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(file1.filename))
-        file2_path = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(file2.filename))
-        
-        file1.save(file1_path)
-        file2.save(file2_path)
+        # Stage files in memory when small enough, otherwise save them temporarily
+        memfds = []
+        disk_paths = []
+        file_paths = []
+        for index, upload in enumerate((file1, file2), 1):
+            staged = upload_to_memfd(upload, f"reqif{index}")
+            if staged:
+                fd, path = staged
+                memfds.append(fd)
+            else:
+                # Random names: the path is internal, and two uploads named alike must not collide
+                path = os.path.join(app.config['UPLOAD_FOLDER'], f"{uuid.uuid4().hex}.reqifz")
+                zero_copy_save(upload, path)
+                disk_paths.append(path)
+            file_paths.append(path)
         
-        start_time = datetime.now()
+        start_ns = time.perf_counter_ns()
         
         # Execute the tool
-        result = ToolExecutor.execute_reqif_comparison(file1_path, file2_path)
-        
-        duration = (datetime.now() - start_time).total_seconds()
-        
-        # Clean up temp files
         try:
-            os.unlink(file1_path)
-            os.unlink(file2_path)
-        except:
-            pass
+            result = ToolExecutor.execute_reqif_comparison(file_paths[0], file_paths[1])
+        finally:
+            # Clean up staged files (memfds are released when closed)
+            for fd in memfds:
+                os.close(fd)
+            for path in disk_paths:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+        
+        duration = (time.perf_counter_ns() - start_ns) / 1e9
         
         # Save execution record
         execution_record = save_execution_record(
@@ -398,13 +794,13 @@ def api_execute_reqif_comparison():
                 'file1_size': file1.content_length,
                 'file2_size': file2.content_length
             },
-            output_result=result['output'],
+            output_path=result['output_path'],
             duration=duration
         )
         
         return jsonify({
             'success': result['success'],
-            'output': result['output'],
+            'output_url': f"/api/output/{execution_record['id']}",
             'error': result['error'],
             'execution_id': execution_record['id'],
             'duration': duration
@@ -436,7 +832,7 @@ def api_execute_user_activity_analyzer():
                 'error': 'Log file path is required'
             }), 400
         
-        start_time = datetime.now()
+        start_ns = time.perf_counter_ns()
         
         # Execute the tool
         result = ToolExecutor.execute_user_activity_analyzer(
@@ -449,7 +845,7 @@ def api_execute_user_activity_analyzer():
             top_percentile=top_percentile
         )
         
-        duration = (datetime.now() - start_time).total_seconds()
+        duration = (time.perf_counter_ns() - start_ns) / 1e9
         
         # Save execution record
         execution_record = save_execution_record(
@@ -464,13 +860,13 @@ def api_execute_user_activity_analyzer():
                 'date_range': date_range,
                 'top_percentile': top_percentile
             },
-            output_result=result['output'],
+            output_path=result['output_path'],
             duration=duration
         )
         
         return jsonify({
             'success': result['success'],
-            'output': result['output'],
+            'output_url': f"/api/output/{execution_record['id']}",
             'error': result['error'],
             'execution_id': execution_record['id'],
             'duration': duration
@@ -488,18 +884,33 @@ def api_execution_history():
     """API endpoint for getting execution history"""
     try:
         limit = request.args.get('limit', 10, type=int)
-        recent_executions = execution_history[-limit:] if len(execution_history) > limit else execution_history
+        with execution_history_lock:
+            recent_executions = list(itertools.islice(reversed(execution_history), max(limit, 0)))
+        recent_executions.reverse()  # Oldest first, as before
         return jsonify(recent_executions)
     except Exception as e:
         logger.error(f"Error getting execution history: {e}")
         return jsonify([])
 
+@app.route('/api/output/<execution_id>')
+def api_execution_output(execution_id):
+    """API endpoint for downloading the full output of an execution"""
+    with execution_history_lock:
+        record = execution_index.get(execution_id)
+    if record is None:
+        return jsonify({
+            'success': False,
+            'error': 'Execution not found'
+        }), 404
+    return send_file(execution_output_path(execution_id), mimetype='text/plain', conditional=True, etag=True)
+
 @app.route('/api/tool-stats')
 def api_tool_stats():
     """API endpoint for getting tool statistics"""
     try:
-        total_executions = len(execution_history)
-        successful_executions = len([e for e in execution_history if e['status'] == 'completed'])
+        with execution_history_lock:
+            total_executions = execution_stats['total']
+            successful_executions = execution_stats['successful']
         success_rate = (successful_executions / total_executions * 100) if total_executions > 0 else 0
         
         return jsonify({
@@ -527,6 +938,16 @@ if __name__ == '__main__':
         print(f"  - {config['name']}")
     print("=" * 60)
     
-    app.run(debug=True, host='0.0.0.0', port=5000) 
+    init_tool_pools()
+    if os.environ.get('FLASK_DEBUG') == '1':
+        app.run(debug=True, host='0.0.0.0', port=5000)
+    else:
+        try:
+            from waitress import serve
+        except ImportError:
+            logger.warning("waitress is not installed, falling back to Flask's threaded server")
+            app.run(host='0.0.0.0', port=5000, threaded=True)
+        else:
+            serve(app, host='0.0.0.0', port=5000, threads=WSGI_THREADS)
     #zzz
     
\ No newline at end of file
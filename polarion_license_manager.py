@@ -10,14 +10,25 @@ Version: 1.0
 """
 #test branch2
 
+import os
 import re
 import sys
+import gzip
 import json
 import logging
-from typing import Dict, List, Tuple, Optional, Set
-from dataclasses import dataclass
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import itertools
+import bisect
+from contextlib import contextmanager
+from typing import Dict, List, Tuple, Optional, Set, Iterable, Iterator
+from dataclasses import dataclass, field
 from datetime import datetime
 import psycopg2
+import psycopg2.pool
+from psycopg2 import sql
 from psycopg2.extras import RealDictCursor
 import getpass
 import pandas as pd
@@ -33,14 +44,92 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Precompiled patterns for license configuration parsing
+_LICENSE_LINE_RE = re.compile(r'(?P<prefix>\w+User)(?P<idx>\d+)=(?P<uid>.+)')
+_ASSIGN_RE = re.compile(r'(concurrent|named)', re.I)
+# The same assignment line, optionally commented out with any number of leading '#'
+_ASSIGN_LINE_RE = re.compile(r'#*\w+User\d+=.')
+_ASSIGNMENT_HEADER_RE = re.compile(r'# (NAMED|CONCURRENT) USERS:')
+_SECTION_HEADER_PREFIX = '# ------------------------------- POLARION'
+
+# A bare user id: word characters, dots and dashes with at least one letter or digit
+# (the leading run can only hold separators, so matching stays linear)
+_USER_ID_TOKEN_RE = re.compile(r'[._\-]*[^\W_][\w.\-]*')
+
+# Assignment types keyed by their header token and by their lowercase line prefix
+_ASSIGNMENT_HEADERS = {'NAMED': 'Named', 'CONCURRENT': 'Concurrent'}
+_ASSIGNMENT_PREFIXES = {'named': 'Named', 'concurrent': 'Concurrent'}
+
+# User and license tables are read as plain strings: no dtype inference (which turned
+# ids like '007' into 7.0) and no NA detection, so empty cells arrive as ''
+TABLE_CSV_OPTIONS = {'dtype': str, 'keep_default_na': False, 'na_filter': False, 'engine': 'c'}
+TABLE_EXCEL_OPTIONS = {'dtype': str, 'keep_default_na': False, 'na_filter': False}
+
+# Leading bytes of Excel workbooks: .xlsx is a ZIP archive, .xls an OLE2 compound file
+_EXCEL_MAGIC = (b'PK\x03\x04', b'\xd0\xcf\x11\xe0')
+
+# Accepted column names (matched case-insensitively, first match wins) for license tables
+_LICENSE_TABLE_COLUMNS = {
+    'license_type': ('license_type', 'licensetype'),
+    'assignment_type': ('assignment_type', 'assignmenttype'),
+    'user_id': ('user_id', 'userid'),
+    'index': ('index',),
+}
+
+# Candidate t_user column names, in order of preference
+_USER_ID_COLUMNS = ('user_id', 'username', 'id')
+_FULL_NAME_COLUMNS = ('full_name', 'display_name', 'name')
+_EMAIL_COLUMNS = ('email', 'email_address')
+
+# Connection pool bounds for the Polarion database
+DB_POOL_MINCONN = 1
+DB_POOL_MAXCONN = 10
+
+# Server-side prepared statements, created once per pooled connection
+_PREPARED_STATEMENTS = {
+    'polarion_user_columns': """
+        SELECT column_name, data_type, is_nullable
+        FROM information_schema.columns 
+        WHERE table_schema = 'polarion' 
+        AND table_name = 't_user'
+        ORDER BY ordinal_position
+    """,
+}
+
+# Rows fetched per round-trip when streaming t_user through a server-side cursor
+FETCH_ITERSIZE = 2000
+
+# Backups larger than this are written gzip-compressed (level 1: fast, still several times smaller)
+BACKUP_COMPRESS_THRESHOLD = 64 * 1024
+
+# Slotted dataclasses drop the per-instance __dict__ (Python 3.10+)
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+class _PreparingConnection(psycopg2.extensions.connection):
+    """Connection that remembers which statements it has already prepared"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared_statements: Set[str] = set()
+
+@dataclass(**_DATACLASS_SLOTS)
 class User:
     """Represents a Polarion user"""
     user_id: str
     full_name: str
     email: str
+    # Lowercase copies for case-insensitive lookups, computed once per user; the id is
+    # interned so the users/entries dict lookups keyed on it share one string object
+    user_id_lower: str = field(init=False, repr=False, compare=False)
+    full_name_lower: str = field(init=False, repr=False, compare=False)
+    email_lower: str = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self.user_id_lower = sys.intern(self.user_id.lower())
+        self.full_name_lower = self.full_name.lower()
+        self.email_lower = self.email.lower()
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class LicenseEntry:
     """Represents a license assignment"""
     license_type: str  # ALM, QA, Requirements, Pro, Reviewer
@@ -49,8 +138,12 @@ class LicenseEntry:
     user_id: str
     line_number: int
     is_active: bool = True
+    user_id_lower: str = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self.user_id_lower = sys.intern(self.user_id.lower())
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class LicenseChange:
     """Represents a license modification"""
     user_id: str
@@ -69,7 +162,35 @@ class PolarionLicenseManager:
         self.license_entries: List[LicenseEntry] = []
         self.license_config_text: str = ""
         self.changes: List[LicenseChange] = []
-        self.db_connection = None
+        self.db_pool: Optional[psycopg2.pool.ThreadedConnectionPool] = None
+        
+        # Reverse lookups for find_user_by_identifier, rebuilt whenever users are (re)loaded
+        self._users_by_email: Dict[str, User] = {}
+        self._users_by_name: Dict[str, User] = {}
+        # Flat lowercase "full_name<TAB>user_id" text of all users, one line per user, with
+        # the offset each line starts at; built on the first partial-match lookup
+        self._user_search_text: Optional[str] = None
+        self._user_search_starts: List[int] = []
+        self._user_search_rows: List[User] = []
+        # Per-instance memo of identifier resolution, cleared with the indexes above
+        self._resolve = functools.lru_cache(maxsize=4096)(self._resolve_identifier)
+        
+        # Active license entries per user and per-license totals, rebuilt lazily by
+        # _ensure_indexes whenever _version has moved past _indexes_version
+        self._user_to_entries: Dict[str, List[LicenseEntry]] = {}
+        self._overall_stats: Dict[str, int] = {}
+        self._version = 0
+        self._indexes_version = 0
+        # Guards the version counters and the rebuild, as main() may parse the license
+        # configuration on a worker thread while users are loading
+        self._indexes_lock = threading.RLock()
+        
+        # Incrementally maintained by parse/add/remove: every entry (active or not) per
+        # user_id_lower and per (license_type, assignment_type), plus the highest active
+        # index per (license_type, assignment_type)
+        self._entries_by_user: Dict[str, List[LicenseEntry]] = {}
+        self._entries_by_slot_type: Dict[Tuple[str, str], List[LicenseEntry]] = {}
+        self._max_slot_index: Dict[Tuple[str, str], int] = {}
         
         # License categories and their patterns
         self.license_categories = {
@@ -82,47 +203,62 @@ class PolarionLicenseManager:
         
         self.assignment_types = ['Named', 'Concurrent']
         
+        # License and assignment type choices for the interactive menus; both are fixed, so build them once
+        self.category_choices = list(self.license_categories)
+        self.category_menu = '\n'.join(f"  {j}. {category}" for j, category in enumerate(self.category_choices, 1))
+        self.assignment_menu = '\n'.join(f"  {j}. {assignment}" for j, assignment in enumerate(self.assignment_types, 1))
+        
+        # Category lookups used while parsing: exact (lowercase) match, and
+        # substring searches over line prefixes (any case) and section headers (exact case)
+        self._category_by_lower = {category.lower(): category for category in self.license_categories}
+        category_alternation = '|'.join(map(re.escape, self.license_categories))
+        self._category_re = re.compile(category_alternation, re.I)
+        self._header_category_re = re.compile(category_alternation)
+        # Exact line prefixes (lowercase), e.g. 'concurrentprouser' -> ('Concurrent', 'Pro')
+        self._prefix_map: Dict[str, Tuple[str, str]] = {
+            f"{assignment.lower()}{category.lower()}user": (assignment, category)
+            for assignment in self.assignment_types
+            for category in self.license_categories
+        }
+        
     def connect_to_database(self, host: str, port: int, database: str, username: str, password: str) -> bool:
         """Connect to Polarion PostgreSQL database"""
         try:
-            self.db_connection = psycopg2.connect(
+            self.close_database()
+            self.db_pool = psycopg2.pool.ThreadedConnectionPool(
+                DB_POOL_MINCONN,
+                DB_POOL_MAXCONN,
                 host=host,
                 port=port,
                 database=database,
                 user=username,
                 password=password,
-                connect_timeout=10
+                connect_timeout=10,
+                connection_factory=_PreparingConnection
             )
             
             # Test the connection
-            with self.db_connection.cursor() as cursor:
-                cursor.execute("SELECT version();")
-                version = cursor.fetchone()
-                logger.info(f"Successfully connected to PostgreSQL: {version[0]}")
-                
-                # Test if polarion schema exists
+            with self._conn() as conn, conn.cursor() as cursor:
+                # Version and schema/table checks in a single round-trip
                 cursor.execute("""
-                    SELECT EXISTS (
-                        SELECT FROM information_schema.schemata 
-                        WHERE schema_name = 'polarion'
-                    );
+                    SELECT version(),
+                           EXISTS (
+                               SELECT FROM information_schema.schemata 
+                               WHERE schema_name = 'polarion'
+                           ),
+                           EXISTS (
+                               SELECT FROM information_schema.tables 
+                               WHERE table_schema = 'polarion' 
+                               AND table_name = 't_user'
+                           );
                 """)
-                schema_exists = cursor.fetchone()[0]
+                version, schema_exists, table_exists = cursor.fetchone()
+                logger.info(f"Successfully connected to PostgreSQL: {version}")
                 
                 if not schema_exists:
                     logger.error("Polarion schema not found in database")
                     return False
                 
-                # Test if t_user table exists
-                cursor.execute("""
-                    SELECT EXISTS (
-                        SELECT FROM information_schema.tables 
-                        WHERE table_schema = 'polarion' 
-                        AND table_name = 't_user'
-                    );
-                """)
-                table_exists = cursor.fetchone()[0]
-                
                 if not table_exists:
                     logger.error("t_user table not found in polarion schema")
                     return False
@@ -138,56 +274,65 @@ class PolarionLicenseManager:
             logger.error(f"Unexpected database error: {e}")
             return False
     
+    @contextmanager
+    def _conn(self):
+        """Borrow a connection from the pool for the duration of a with-block"""
+        conn = self.db_pool.getconn()
+        try:
+            yield conn
+        finally:
+            # Connections dropped by the server are discarded rather than reused
+            self.db_pool.putconn(conn, close=bool(conn.closed))
+    
+    @staticmethod
+    def _execute_prepared(cursor, name: str):
+        """Run a statement from _PREPARED_STATEMENTS, preparing it on first use per connection"""
+        conn = cursor.connection
+        statement = sql.Identifier(name)
+        if name not in conn.prepared_statements:
+            cursor.execute(sql.SQL("PREPARE {} AS ").format(statement) + sql.SQL(_PREPARED_STATEMENTS[name]))
+            conn.prepared_statements.add(name)
+        cursor.execute(sql.SQL("EXECUTE {}").format(statement))
+    
+    def close_database(self):
+        """Close all pooled database connections"""
+        if self.db_pool is not None:
+            self.db_pool.closeall()
+            self.db_pool = None
+    
     def test_database_connection(self) -> Dict[str, any]:
         """Test database connection and return detailed status"""
-        if not self.db_connection:
+        if not self.db_pool:
             return {
                 'connected': False,
                 'error': 'No database connection established'
             }
         
         try:
-            with self.db_connection.cursor() as cursor:
-                # Test basic connection
-                cursor.execute("SELECT version();")
-                version = cursor.fetchone()
-                
-                # Check schema
+            with self._conn() as conn, conn.cursor() as cursor:
+                # Version, schema/table checks and user count in a single round-trip
                 cursor.execute("""
-                    SELECT EXISTS (
-                        SELECT FROM information_schema.schemata 
-                        WHERE schema_name = 'polarion'
-                    );
+                    SELECT version(),
+                           EXISTS (
+                               SELECT FROM information_schema.schemata 
+                               WHERE schema_name = 'polarion'
+                           ),
+                           EXISTS (
+                               SELECT FROM information_schema.tables 
+                               WHERE table_schema = 'polarion' 
+                               AND table_name = 't_user'
+                           ),
+                           (SELECT COUNT(*) FROM polarion.t_user);
                 """)
-                schema_exists = cursor.fetchone()[0]
-                
-                # Check table
-                cursor.execute("""
-                    SELECT EXISTS (
-                        SELECT FROM information_schema.tables 
-                        WHERE table_schema = 'polarion' 
-                        AND table_name = 't_user'
-                    );
-                """)
-                table_exists = cursor.fetchone()[0]
+                version, schema_exists, table_exists, user_count = cursor.fetchone()
                 
                 # Get table structure
-                cursor.execute("""
-                    SELECT column_name, data_type, is_nullable
-                    FROM information_schema.columns 
-                    WHERE table_schema = 'polarion' 
-                    AND table_name = 't_user'
-                    ORDER BY ordinal_position;
-                """)
+                self._execute_prepared(cursor, 'polarion_user_columns')
                 columns = cursor.fetchall()
                 
-                # Count users
-                cursor.execute("SELECT COUNT(*) FROM polarion.t_user;")
-                user_count = cursor.fetchone()[0]
-                
                 return {
                     'connected': True,
-                    'version': version[0],
+                    'version': version,
                     'schema_exists': schema_exists,
                     'table_exists': table_exists,
                     'columns': columns,
@@ -225,114 +370,104 @@ class PolarionLicenseManager:
     
     def fetch_active_users(self) -> bool:
         """Fetch all active users from Polarion database"""
-        if not self.db_connection:
+        if not self.db_pool:
             logger.error("No database connection available")
             return False
-            
+        
         try:
-            with self.db_connection.cursor(cursor_factory=RealDictCursor) as cursor:
-                # First, let's see what columns are available
-                cursor.execute("""
-                    SELECT column_name, data_type 
-                    FROM information_schema.columns 
-                    WHERE table_schema = 'polarion' 
-                    AND table_name = 't_user'
-                    ORDER BY ordinal_position;
-                """)
-                columns = cursor.fetchall()
-                logger.info(f"Available columns in t_user: {[col['column_name'] for col in columns]}")
-                
-                # Try different possible column combinations
-                possible_queries = [
-                    # Standard expected columns
-                    """
-                    SELECT user_id, full_name, email 
-                    FROM polarion.t_user 
-                    WHERE user_id IS NOT NULL
-                    ORDER BY user_id
-                    """,
-                    # Alternative column names
-                    """
-                    SELECT username as user_id, display_name as full_name, email_address as email
-                    FROM polarion.t_user 
-                    WHERE username IS NOT NULL
-                    ORDER BY username
-                    """,
-                    # Minimal query with just user_id
-                    """
-                    SELECT user_id, user_id as full_name, user_id as email
-                    FROM polarion.t_user 
-                    WHERE user_id IS NOT NULL
-                    ORDER BY user_id
-                    """,
-                    # Try with different column names
-                    """
-                    SELECT id as user_id, name as full_name, email
-                    FROM polarion.t_user 
-                    WHERE id IS NOT NULL
-                    ORDER BY id
-                    """
-                ]
-                
-                users_data = None
-                successful_query = None
+            with self._conn() as conn:
+                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                    # First, let's see what columns are available
+                    self._execute_prepared(cursor, 'polarion_user_columns')
+                    columns = cursor.fetchall()
+                    logger.info(f"Available columns in t_user: {[col['column_name'] for col in columns]}")
                 
-                for i, query in enumerate(possible_queries):
-                    try:
-                        cursor.execute(query)
-                        users_data = cursor.fetchall()
-                        successful_query = i
-                        logger.info(f"Query {i+1} successful, found {len(users_data)} users")
-                        break
-                    except Exception as e:
-                        logger.warning(f"Query {i+1} failed: {e}")
-                        continue
-                
-                if users_data is None:
-                    logger.error("All database queries failed")
+                query = self._build_users_query({col['column_name'] for col in columns})
+                if query is None:
+                    logger.error("No user id column found in polarion.t_user")
                     return False
                 
-                self.users.clear()
-                
-                for row in users_data:
-                    user = User(
-                        user_id=str(row['user_id']),
-                        full_name=str(row['full_name']) if row['full_name'] else '',
-                        email=str(row['email']) if row['email'] else ''
-                    )
-                    self.users[user.user_id.lower()] = user
-                
-                logger.info(f"Successfully fetched {len(self.users)} active users from database")
-                
-                # Log first few users for debugging
-                if self.users:
-                    sample_users = list(self.users.values())[:5]
-                    logger.info(f"Sample users: {[(u.user_id, u.full_name, u.email) for u in sample_users]}")
-                
-                return True
+                user_count = 0
+                # Named (server-side) cursor: rows are streamed in itersize batches
+                # instead of materializing the whole table with fetchall()
+                users_cursor = conn.cursor(name='polarion_users', cursor_factory=RealDictCursor)
+                try:
+                    users_cursor.itersize = FETCH_ITERSIZE
+                    users_cursor.execute(query)
+                    
+                    self.users.clear()
+                    
+                    for row in users_cursor:
+                        user = User(
+                            user_id=str(row['user_id']),
+                            full_name=str(row['full_name']) if row['full_name'] else '',
+                            email=str(row['email']) if row['email'] else ''
+                        )
+                        self.users[user.user_id_lower] = user
+                        user_count += 1
+                finally:
+                    users_cursor.close()
+            
+            logger.info(f"Found {user_count} users")
+            self._rebuild_user_indexes()
+            logger.info(f"Successfully fetched {len(self.users)} active users from database")
+            
+            # Log first few users for debugging
+            if self.users and logger.isEnabledFor(logging.INFO):
+                sample_users = itertools.islice(self.users.values(), 5)
+                logger.info(f"Sample users: {[(u.user_id, u.full_name, u.email) for u in sample_users]}")
+            
+            return True
                 
         except Exception as e:
             logger.error(f"Error fetching users from database: {e}")
             return False
     
+    @staticmethod
+    def _build_users_query(column_names: Set[str]) -> Optional[sql.Composed]:
+        """Build the t_user SELECT from the columns that actually exist, or None if there is no id column"""
+        def pick(candidates, default=None):
+            return next((name for name in candidates if name in column_names), default)
+        
+        user_id_col = pick(_USER_ID_COLUMNS)
+        if user_id_col is None:
+            return None
+        full_name_col = pick(_FULL_NAME_COLUMNS, user_id_col)
+        email_col = pick(_EMAIL_COLUMNS, user_id_col)
+        logger.info(f"Using t_user columns: user_id={user_id_col}, full_name={full_name_col}, email={email_col}")
+        
+        return sql.SQL(
+            "SELECT {uid} AS user_id, {name} AS full_name, {email} AS email "
+            "FROM polarion.t_user WHERE {uid} IS NOT NULL ORDER BY {uid}"
+        ).format(
+            uid=sql.Identifier(user_id_col),
+            name=sql.Identifier(full_name_col),
+            email=sql.Identifier(email_col)
+        )
+    
+    @staticmethod
+    def _read_table(file_path: str) -> Tuple[pd.DataFrame, str]:
+        """Read a CSV or Excel file, returning the DataFrame and the detected file type"""
+        lower_path = file_path.lower()
+        if lower_path.endswith('.csv'):
+            is_excel = False
+        elif lower_path.endswith(('.xlsx', '.xls')):
+            is_excel = True
+        else:
+            # No telling extension (e.g. uploaded files): check the leading bytes instead
+            # of attempting a CSV parse first and falling back to Excel on any error
+            with open(file_path, 'rb') as f:
+                is_excel = f.read(8).startswith(_EXCEL_MAGIC)
+        
+        if is_excel:
+            return pd.read_excel(file_path, **TABLE_EXCEL_OPTIONS), "Excel"
+        return pd.read_csv(file_path, **TABLE_CSV_OPTIONS), "CSV"
+    
     def load_users_from_file(self, file_path: str) -> bool:
         """Load users from CSV or Excel file as an alternative to database"""
         try:
             # Automatically detect file type and read
-            if file_path.lower().endswith('.csv'):
-                df = pd.read_csv(file_path)
-                file_type = "CSV"
-            elif file_path.lower().endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(file_path)
-                file_type = "Excel"
-            else:
-                # Try to read as CSV first, then Excel
-                try:
-                    df = pd.read_csv(file_path)
-                    file_type = "CSV"
-                except:
-                    df = pd.read_excel(file_path)
-                    file_type = "Excel"
+            df, file_type = self._read_table(file_path)
             
             logger.info(f"Loading users from {file_type} file: {file_path}")
             logger.info(f"Found {len(df)} rows in the file")
@@ -365,10 +500,7 @@ class PolarionLicenseManager:
                 # This looks like a Polarion export format
                 # But we need to find which column actually contains usernames
                 # Let's check if c_uri contains alphanumeric values (usernames) or just numbers
-                sample_c_uri = df['c_uri'].head(10).astype(str)
-                has_letters_in_c_uri = any(any(c.isalpha() for c in str(val)) for val in sample_c_uri)
-                
-                if has_letters_in_c_uri:
+                if self._column_has_letters(df, 'c_uri'):
                     # c_uri contains usernames
                     user_id_col = 'c_uri'
                     name_col = 'c_uri'
@@ -377,23 +509,17 @@ class PolarionLicenseManager:
                     # c_uri contains numbers, look for another column with usernames
                     logger.info("c_uri contains numbers, looking for username column...")
                     # First, check for c_id which commonly contains usernames in Polarion exports
-                    if 'c_id' in df.columns:
-                        sample_c_id = df['c_id'].head(10).astype(str)
-                        has_letters_in_c_id = any(any(c.isalpha() for c in str(val)) for val in sample_c_id)
-                        if has_letters_in_c_id:
-                            user_id_col = 'c_id'
-                            logger.info("Found username column: c_id")
+                    if 'c_id' in df.columns and self._column_has_letters(df, 'c_id'):
+                        user_id_col = 'c_id'
+                        logger.info("Found username column: c_id")
                     
                     # If c_id doesn't work, check other columns
                     if not user_id_col:
                         for col in df.columns:
-                            if col != 'c_pk' and col != 'c_uri' and col != 'c_id':
-                                sample_values = df[col].head(10).astype(str)
-                                has_letters = any(any(c.isalpha() for c in str(val)) for val in sample_values)
-                                if has_letters:
-                                    user_id_col = col
-                                    logger.info(f"Found username column: {col}")
-                                    break
+                            if col not in ('c_pk', 'c_uri', 'c_id') and self._column_has_letters(df, col):
+                                user_id_col = col
+                                logger.info(f"Found username column: {col}")
+                                break
                     
                     if not user_id_col:
                         # Fallback to c_uri even if it's numeric
@@ -420,33 +546,31 @@ class PolarionLicenseManager:
             
             logger.info(f"Using columns: user_id={user_id_col}, name={name_col}, email={email_col}")
             
-            # Process each row
-            for index, row in df.iterrows():
-                # Debug: Log the raw values being read
-                if index < 3:  # Log first 3 rows for debugging
-                    logger.info(f"Row {index}: user_id_col='{user_id_col}' value='{row[user_id_col] if user_id_col else 'None'}', name_col='{name_col}' value='{row[name_col] if name_col else 'None'}', email_col='{email_col}' value='{row[email_col] if email_col else 'None'}'")
-                
-                user_id = str(row[user_id_col]) if user_id_col and pd.notna(row[user_id_col]) else f"user_{index}"
-                full_name = str(row[name_col]) if name_col and pd.notna(row[name_col]) else user_id
-                email = str(row[email_col]) if email_col and pd.notna(row[email_col]) else ""
-                
-                # Clean up the data
-                user_id = user_id.strip()
-                full_name = full_name.strip()
-                email = email.strip()
-                
-                user = User(
-                    user_id=user_id,
-                    full_name=full_name,
-                    email=email
-                )
-                self.users[user.user_id.lower()] = user
+            # Convert the mapped columns in bulk; missing values fall back like before
+            default_ids = pd.Series([f"user_{index}" for index in df.index], index=df.index)
+            user_ids = self._column_as_str(df, user_id_col, default_ids)
+            full_names = self._column_as_str(df, name_col, user_ids)
+            emails = self._column_as_str(df, email_col, "")
+            
+            user_ids = user_ids.str.strip().tolist()
+            full_names = full_names.str.strip().tolist()
+            emails = emails.str.strip().tolist()
             
+            # Debug: Log the values read for the first 3 rows
+            if logger.isEnabledFor(logging.DEBUG):
+                for index, (user_id, full_name, email) in enumerate(zip(user_ids[:3], full_names, emails)):
+                    logger.debug(f"Row {index}: user_id_col='{user_id_col}' value='{user_id}', name_col='{name_col}' value='{full_name}', email_col='{email_col}' value='{email}'")
+            
+            for user_id, full_name, email in zip(user_ids, full_names, emails):
+                user = User(user_id=user_id, full_name=full_name, email=email)
+                self.users[user.user_id_lower] = user
+            
+            self._rebuild_user_indexes()
             logger.info(f"Successfully loaded {len(self.users)} users from file")
             
             # Log first few users for debugging
-            if self.users:
-                sample_users = list(self.users.values())[:5]
+            if self.users and logger.isEnabledFor(logging.INFO):
+                sample_users = itertools.islice(self.users.values(), 5)
                 logger.info(f"Sample users: {[(u.user_id, u.full_name, u.email) for u in sample_users]}")
             
             return True
@@ -455,175 +579,277 @@ class PolarionLicenseManager:
             logger.error(f"Error loading users from file: {e}")
             return False
     
+    @staticmethod
+    def _column_has_letters(df: pd.DataFrame, column: str) -> bool:
+        """Check whether any of the first 10 values of a column contains a letter"""
+        return bool(df[column].head(10).astype(str).str.contains(r'[^\W\d_]', regex=True).any())
+    
+    @staticmethod
+    def _column_as_str(df: pd.DataFrame, column: Optional[str], fallback) -> pd.Series:
+        """Return a column as strings, using fallback where the column is missing or empty"""
+        if not column:
+            return fallback if isinstance(fallback, pd.Series) else pd.Series(fallback, index=df.index, dtype=object)
+        values = df[column].astype(str)
+        return values.where(values != '', fallback)
+    
     def parse_license_configuration(self, config_text: str) -> bool:
         """Parse the license configuration text"""
         self.license_config_text = config_text
+        return self.parse_license_configuration_stream(enumerate(config_text.splitlines(), 1))
+    
+    def parse_license_configuration_file(self, file_path: str) -> bool:
+        """Parse a license configuration file while reading it line by line"""
+        chunks: List[str] = []
+        
+        def recorded(lines):
+            # Keep the raw text for backups and regeneration without a second read
+            for line in lines:
+                chunks.append(line)
+                yield line
+        
+        with open(file_path, 'r', encoding='utf-8') as f:
+            result = self.parse_license_configuration_stream(enumerate(recorded(f), 1))
+        
+        self.license_config_text = ''.join(chunks)
+        return result
+    
+    def parse_license_configuration_stream(self, numbered_lines: Iterable[Tuple[int, str]]) -> bool:
+        """Parse (line_number, line) pairs of a license configuration"""
         self.license_entries.clear()
         
-        lines = config_text.split('\n')
         current_category = None
         current_assignment_type = None
+        active_count = 0
         
-        for line_num, line in enumerate(lines, 1):
+        for line_num, line in numbered_lines:
             line = line.strip()
             
             # Skip empty lines
             if not line:
                 continue
+            
+            if line[0] == '#':
+                # Check for section headers
+                if line.startswith(_SECTION_HEADER_PREFIX):
+                    header_match = self._header_category_re.search(line)
+                    if header_match:
+                        current_category = header_match.group(0)
+                    continue
                 
-            # Check for section headers
-            if line.startswith('# ------------------------------- POLARION'):
-                for category in self.license_categories:
-                    if category in line:
-                        current_category = category
-                        break
-                continue
+                # Check for assignment type headers
+                header_match = _ASSIGNMENT_HEADER_RE.match(line)
+                if header_match:
+                    current_assignment_type = _ASSIGNMENT_HEADERS[header_match.group(1)]
+                    continue
                 
-            # Check for assignment type headers
-            if line.startswith('# NAMED USERS:'):
-                current_assignment_type = 'Named'
-                continue
-            elif line.startswith('# CONCURRENT USERS:'):
-                current_assignment_type = 'Concurrent'
+                # Plain comments never reach the assignment regex
+                if '=' not in line:
+                    continue
+                
+                # Commented-out license assignment
+                is_active = False
+                line = line[1:].strip()
+            elif '=' in line:
+                is_active = True
+            else:
                 continue
+            
+            # Parse the license assignment
+            match = _LICENSE_LINE_RE.match(line)
+            if match:
+                prefix, index_str, user_id = match.groups()
+                index = int(index_str)
+
+                # Skip empty user assignments
+                if not user_id.strip():
+                    continue
                 
-            # Parse license assignment lines
-            if '=' in line:
-                # Check if line is commented out
-                is_active = not line.startswith('#')
-                if not is_active:
-                    line = line[1:].strip()  # Remove comment symbol
+                # Determine license category and assignment type from the prefix
+                # Examples: concurrentProUser, namedALMUser, etc.
+                license_category = None
                 
-                # Parse the assignment
-                match = re.match(r'(\w+User)(\d+)=(.+)', line)
-                if match:
-                    prefix, index_str, user_id = match.groups()
-                    index = int(index_str)
-
-                    # Skip empty user assignments
-                    if not user_id.strip():
-                        continue
-                    
-                    # Determine license category and assignment type from the prefix
-                    # Examples: concurrentProUser, namedALMUser, etc.
-                    license_category = None
-                    assignment_type = None
-                    
-                    # Check for assignment type first
-                    if prefix.lower().startswith('concurrent'):
-                        assignment_type = 'Concurrent'
-                        # Extract license category from the rest
-                        category_part = prefix[10:]  # Remove 'concurrent'
-                    elif prefix.lower().startswith('named'):
-                        assignment_type = 'Named'
-                        # Extract license category from the rest
-                        category_part = prefix[5:]  # Remove 'named'
+                prefix_info = self._prefix_map.get(prefix.lower())
+                if prefix_info:
+                    assignment_type, license_category = prefix_info
+                else:
+                    assign_match = _ASSIGN_RE.match(prefix)
+                    if assign_match:
+                        assignment_type = _ASSIGNMENT_PREFIXES[assign_match.group(1).lower()]
+                        # The category sits between the assignment type and the 'User' suffix
+                        category_part = prefix[assign_match.end():].replace('User', '')
+                        license_category = self._category_by_lower.get(category_part.lower())
                     else:
-                        # Try to infer from the prefix
-                        for category in self.license_categories:
-                            if category.lower() in prefix.lower():
-                                license_category = category
-                                break
-                        
                         # Default to Concurrent if we can't determine
                         assignment_type = 'Concurrent'
-                    
-                    # If we haven't determined the license category yet, try to extract it
-                    if not license_category:
-                        if 'category_part' in locals():
-                            # Remove 'User' suffix and capitalize
-                            category_part = category_part.replace('User', '')
-                            for category in self.license_categories:
-                                if category.lower() == category_part.lower():
-                                    license_category = category
-                                    break
-                    
-                    # If still no category, try to infer from the prefix
-                    if not license_category:
-                        for category in self.license_categories:
-                            if category.lower() in prefix.lower():
-                                license_category = category
-                                break
-                    
-                    # Use current_category/assignment_type only if we couldn't determine from the line itself
-                    if not license_category and current_category:
-                        license_category = current_category
-                    if not assignment_type and current_assignment_type:
-                        assignment_type = current_assignment_type
-                    
-                    # If we still can't determine, skip this entry
-                    if not license_category or not assignment_type:
-                        logger.warning(f"Could not determine license category or assignment type for line: {line}")
-                        continue
-                    
-                    license_entry = LicenseEntry(
-                        license_type=license_category,
-                        assignment_type=assignment_type,
-                        index=index,
-                        user_id=user_id.strip(),
-                        line_number=line_num,
-                        is_active=is_active
-                    )
-                    self.license_entries.append(license_entry)
-        
-        logger.info(f"Parsed {len([e for e in self.license_entries if e.is_active])} active license entries")
+                
+                # If still no category, try to infer from the prefix
+                if not license_category:
+                    category_match = self._category_re.search(prefix)
+                    if category_match:
+                        license_category = self._category_by_lower[category_match.group(0).lower()]
+                
+                # Use current_category/assignment_type only if we couldn't determine from the line itself
+                if not license_category and current_category:
+                    license_category = current_category
+                if not assignment_type and current_assignment_type:
+                    assignment_type = current_assignment_type
+                
+                # If we still can't determine, skip this entry
+                if not license_category or not assignment_type:
+                    logger.warning(f"Could not determine license category or assignment type for line: {line}")
+                    continue
+                
+                license_entry = LicenseEntry(
+                    license_type=license_category,
+                    assignment_type=assignment_type,
+                    index=index,
+                    user_id=user_id.strip(),
+                    line_number=line_num,
+                    is_active=is_active
+                )
+                self.license_entries.append(license_entry)
+                active_count += is_active
+        
+        # The license table is rebuilt on first use; parsing never reads self.users,
+        # so it can run alongside a user load (see main)
+        self._entries_by_user = {}
+        self._entries_by_slot_type = {}
+        self._max_slot_index = {}
+        for entry in self.license_entries:
+            self._index_entry(entry)
+        self._invalidate_indexes()
+        logger.info(f"Parsed {active_count} active license entries")
         return True
     
-    def build_combined_user_license_table(self) -> Dict[str, List[LicenseEntry]]:
-        """Build combined table of users and their licenses"""
-        user_licenses: Dict[str, List[LicenseEntry]] = {}
-        
-        # Initialize with all users
-        for user_id, user in self.users.items():
-            user_licenses[user_id] = []
+    def _index_entry(self, entry: LicenseEntry):
+        """Add a license entry to the per-user and per-slot-type indexes"""
+        slot_type = (entry.license_type, entry.assignment_type)
+        self._entries_by_user.setdefault(entry.user_id_lower, []).append(entry)
+        self._entries_by_slot_type.setdefault(slot_type, []).append(entry)
+        if entry.is_active and entry.index > self._max_slot_index.get(slot_type, 0):
+            self._max_slot_index[slot_type] = entry.index
+    
+    def _invalidate_indexes(self):
+        """Mark the license table stale after users or license entries change"""
+        with self._indexes_lock:
+            self._version += 1
+    
+    def _ensure_indexes(self):
+        """Rebuild the license table only if something changed since the last build"""
+        with self._indexes_lock:
+            if self._indexes_version != self._version:
+                self._rebuild_indexes()
+                self._indexes_version = self._version
+    
+    def _rebuild_indexes(self):
+        """Rebuild the per-user license table and overall license counts in one pass"""
+        user_to_entries: Dict[str, List[LicenseEntry]] = {user_id: [] for user_id in self.users}
+        overall_stats: Dict[str, int] = {}
         
-        # Add license assignments
         for entry in self.license_entries:
             if entry.is_active:
-                user_id_lower = entry.user_id.lower()
-                if user_id_lower in user_licenses:
-                    user_licenses[user_id_lower].append(entry)
+                license_key = f"{entry.assignment_type}{entry.license_type}"
+                overall_stats[license_key] = overall_stats.get(license_key, 0) + 1
+                
+                user_id_lower = entry.user_id_lower
+                if user_id_lower in user_to_entries:
+                    user_to_entries[user_id_lower].append(entry)
                 else:
                     # User not in active database (stale license)
-                    user_licenses[entry.user_id] = [entry]
+                    user_to_entries[entry.user_id] = [entry]
         
-        return user_licenses
+        self._user_to_entries = user_to_entries
+        self._overall_stats = overall_stats
     
-    def find_user_by_identifier(self, identifier: str) -> Optional[User]:
-        """Find user by various identifiers (email, name, user_id)"""
-        identifier = identifier.strip().lower()
-        
-        # Direct user_id match
-        if identifier in self.users:
-            return self.users[identifier]
-        
-        # Email match
-        for user in self.users.values():
-            if user.email.lower() == identifier:
-                return user
-        
-        # Full name match (case insensitive)
-        for user in self.users.values():
-            if user.full_name.lower() == identifier:
-                return user
-        
-        # Partial name match
-        matching_users = []
+    def build_combined_user_license_table(self) -> Dict[str, List[LicenseEntry]]:
+        """Build combined table of users and their licenses"""
+        self._ensure_indexes()
+        return self._user_to_entries
+    
+    def _rebuild_user_indexes(self):
+        """Rebuild the email and full-name lookups after self.users changes"""
+        self._users_by_email = {}
+        self._users_by_name = {}
         for user in self.users.values():
-            if identifier in user.full_name.lower() or identifier in user.user_id.lower():
-                matching_users.append(user)
+            # setdefault keeps the first user for a key, matching the old linear scans
+            if user.email:
+                self._users_by_email.setdefault(user.email_lower, user)
+            if user.full_name:
+                self._users_by_name.setdefault(user.full_name_lower, user)
+        self._user_search_text = None
+        self._resolve.cache_clear()
+        self._invalidate_indexes()
+    
+    def _partial_matches(self, identifier: str) -> Iterator[User]:
+        """Yield users whose lowercase full name or user_id contains identifier, in user order"""
+        if '\t' in identifier or '\n' in identifier:
+            # Could straddle the separators of the search text; scan the users directly
+            yield from (
+                user for user in self.users.values()
+                if identifier in user.full_name_lower or identifier in user.user_id_lower
+            )
+            return
         
-        if len(matching_users) == 1:
-            return matching_users[0]
-        elif len(matching_users) > 1:
-            logger.warning(f"Multiple users found for '{identifier}': {[u.user_id for u in matching_users]}")
+        if self._user_search_text is None:
+            rows = list(self.users.values())
+            starts = []
+            position = 0
+            for user in rows:
+                starts.append(position)
+                position += len(user.full_name_lower) + len(user.user_id_lower) + 2
+            self._user_search_text = '\n'.join(f"{user.full_name_lower}\t{user.user_id_lower}" for user in rows)
+            self._user_search_starts = starts
+            self._user_search_rows = rows
+        
+        # str.find scans the whole table in C; each hit maps back to its user by offset
+        text = self._user_search_text
+        starts = self._user_search_starts
+        position = text.find(identifier) if starts else -1
+        while position != -1:
+            row = bisect.bisect_right(starts, position) - 1
+            yield self._user_search_rows[row]
+            if row + 1 == len(starts):
+                return
+            position = text.find(identifier, starts[row + 1])
+    
+    def find_user_by_identifier(self, identifier: str) -> Optional[User]:
+        """Find user by various identifiers (email, name, user_id)"""
+        return self._resolve(identifier.strip().lower())
+    
+    def resolve_identifiers(self, identifiers: Iterable[str]) -> Tuple[List[User], List[str]]:
+        """Look up several identifiers at once, returning the users found and the identifiers that were not"""
+        resolve = self._resolve
+        resolved = [(identifier, resolve(identifier.strip().lower())) for identifier in identifiers]
+        found_users = [user for _, user in resolved if user]
+        missing_identifiers = [identifier for identifier, user in resolved if not user]
+        return found_users, missing_identifiers
+    
+    def _resolve_identifier(self, identifier: str) -> Optional[User]:
+        """Resolve a normalized (stripped, lowercased) identifier to a user"""
+        # Direct user_id match, then exact email and full name (case insensitive)
+        user = (self.users.get(identifier)
+                or self._users_by_email.get(identifier)
+                or self._users_by_name.get(identifier))
+        if user:
+            return user
+        
+        # Partial name match; only 0, 1 or "more than one" matters, so stop at the second hit
+        partial_matches = self._partial_matches(identifier)
+        first_match = next(partial_matches, None)
+        if first_match is not None:
+            second_match = next(partial_matches, None)
+            if second_match is None:
+                return first_match
+            logger.warning(f"Multiple users found for '{identifier}', including '{first_match.user_id}' and '{second_match.user_id}'")
             return None
         
         # If no match found, provide detailed debugging information
         logger.info(f"User '{identifier}' not found.")
+        if not logger.isEnabledFor(logging.INFO):
+            return None
         if self.users:
             # Show sample of available user identifiers for debugging
-            sample_users = list(self.users.values())[:10]
+            sample_users = list(itertools.islice(self.users.values(), 10))
             available_ids = [f"'{u.user_id}'" for u in sample_users]
             available_names = [f"'{u.full_name}'" for u in sample_users if u.full_name]
             available_emails = [f"'{u.email}'" for u in sample_users if u.email]
@@ -642,27 +868,28 @@ class PolarionLicenseManager:
         
         return None
     
-    def query_user_licenses(self, identifiers: List[str]) -> List[Dict]:
-        """Query license status for specific users with detailed statistics"""
+    def query_user_licenses(self, identifiers: List[str]) -> Tuple[List[Dict], Dict]:
+        """Query license status for specific users.
+
+        Returns the per-identifier results together with the aggregate
+        statistics, which are computed once for the whole query.
+        """
         results = []
-        user_licenses = self.build_combined_user_license_table()
-        
-        # Calculate overall license statistics
-        overall_stats = {}
-        for entry in self.license_entries:
-            if entry.is_active:
-                license_key = f"{entry.assignment_type}{entry.license_type}"
-                overall_stats[license_key] = overall_stats.get(license_key, 0) + 1
+        self._ensure_indexes()
+        user_licenses = self._user_to_entries
+        overall_stats = self._overall_stats
         
         # Calculate aggregate statistics for queried users only
         queried_users_stats = {}
         queried_users_found = []
         
-        for identifier in identifiers:
-            user = self.find_user_by_identifier(identifier)
+        # Resolve each identifier once and reuse it for the stats and the results
+        resolved_users = [self.find_user_by_identifier(identifier) for identifier in identifiers]
+        
+        for user in resolved_users:
             if user:
                 queried_users_found.append(user)
-                user_entries = user_licenses.get(user.user_id.lower(), [])
+                user_entries = user_licenses.get(user.user_id_lower, [])
                 for entry in user_entries:
                     if entry.is_active:
                         license_key = f"{entry.assignment_type}{entry.license_type}"
@@ -673,9 +900,7 @@ class PolarionLicenseManager:
         logger.info(f"Queried users stats: {queried_users_stats}")
         logger.info(f"Queried users found: {[u.user_id for u in queried_users_found]}")
         
-        for identifier in identifiers:
-            user = self.find_user_by_identifier(identifier)
-            
+        for identifier, user in zip(identifiers, resolved_users):
             if not user:
                 results.append({
                     'identifier': identifier,
@@ -684,7 +909,7 @@ class PolarionLicenseManager:
                 })
                 continue
             
-            user_entries = user_licenses.get(user.user_id.lower(), [])
+            user_entries = user_licenses.get(user.user_id_lower, [])
             
             if not user_entries:
                 results.append({
@@ -707,26 +932,12 @@ class PolarionLicenseManager:
                 if user_license_info:
                     detailed_info = f"{user.full_name} - {user.email} - {', '.join(user_license_info)}"
                     
-                    # Add aggregate statistics for queried users only
-                    queried_stats_lines = []
-                    for license_type, count in queried_users_stats.items():
-                        queried_stats_lines.append(f"{license_type} - {count}")
-                    
-                    # Add overall statistics
-                    overall_lines = []
-                    for license_type, count in overall_stats.items():
-                        overall_lines.append(f"{license_type} - {count}")
-                    
                     results.append({
                         'identifier': identifier,
                         'user': user,
                         'status': 'has_license',
                         'licenses': user_license_info,
-                        'overall_stats': overall_stats,
-                        'queried_users_stats': queried_users_stats,
-                        'message': detailed_info,
-                        'user_stats_message': '\n'.join(queried_stats_lines),
-                        'overall_stats_message': '\n'.join(overall_lines)
+                        'message': detailed_info
                     })
                 else:
                     results.append({
@@ -736,43 +947,41 @@ class PolarionLicenseManager:
                         'message': f"{user.full_name} - {user.email} - No active license assigned"
                     })
         
-        return results
+        # Format the aggregate statistics once for the whole query
+        stats = {
+            'overall_stats': overall_stats,
+            'queried_users_stats': queried_users_stats,
+            'user_stats_message': '\n'.join(f"{license_type} - {count}" for license_type, count in queried_users_stats.items()),
+            'overall_stats_message': '\n'.join(f"{license_type} - {count}" for license_type, count in overall_stats.items())
+        }
+        
+        return results, stats
     
     def find_inactive_users_with_licenses(self) -> List[LicenseEntry]:
         """Find users with licenses who are not in the active user database"""
         inactive_entries = []
         
         for entry in self.license_entries:
-            if entry.is_active:
-                user_id_lower = entry.user_id.lower()
-                if user_id_lower not in self.users:
-                    inactive_entries.append(entry)
+            if entry.is_active and entry.user_id_lower not in self.users:
+                inactive_entries.append(entry)
         
         return inactive_entries
     
     def find_available_slot(self, license_type: str, assignment_type: str) -> int:
         """Find the next available slot for a license type"""
-        existing_indices = [
-            entry.index for entry in self.license_entries
-            if entry.license_type == license_type 
-            and entry.assignment_type == assignment_type
-            and entry.is_active
-        ]
-        
-        if not existing_indices:
-            return 1
-        
-        return max(existing_indices) + 1
+        return self._max_slot_index.get((license_type, assignment_type), 0) + 1
     
-    def add_user_license(self, user: User, license_type: str, assignment_type: str) -> bool:
-        """Add a license for a user"""
+    def _append_entry(self, user: User, license_type: str, assignment_type: str) -> Optional[LicenseEntry]:
+        """Create and index a new license entry unless the user already holds an active one"""
         # Check if user already has a license
-        user_licenses = self.build_combined_user_license_table()
-        existing_licenses = user_licenses.get(user.user_id.lower(), [])
+        existing_licenses = [
+            entry for entry in self._entries_by_user.get(user.user_id_lower, ())
+            if entry.is_active
+        ]
         
         if existing_licenses:
             logger.warning(f"User {user.user_id} already has licenses: {[f'{e.assignment_type} {e.license_type}' for e in existing_licenses]}")
-            return False
+            return None
         
         # Find available slot
         new_index = self.find_available_slot(license_type, assignment_type)
@@ -788,27 +997,26 @@ class PolarionLicenseManager:
         )
         
         self.license_entries.append(new_entry)
+        self._index_entry(new_entry)
+        return new_entry
+    
+    def _add_entry_internal(self, user: User, license_type: str, assignment_type: str) -> Optional[LicenseEntry]:
+        """Assign a license slot to a user without recording a change; returns the new entry"""
+        new_entry = self._append_entry(user, license_type, assignment_type)
+        if not new_entry:
+            return None
         
-        # Record change
-        change = LicenseChange(
-            user_id=user.user_id,
-            user_name=user.full_name,
-            action='add',
-            new_license=f"{assignment_type} {license_type}",
-            line_added=f"{assignment_type.lower()}{license_type}User{new_index}={user.user_id}"
-        )
-        self.changes.append(change)
+        self._invalidate_indexes()
         
-        logger.info(f"Added {assignment_type} {license_type} license for {user.user_id}")
-        return True
+        logger.info("Added %s %s license for %s", assignment_type, license_type, user.user_id)
+        return new_entry
     
-    def remove_user_license(self, user_id: str, license_type: str, assignment_type: str) -> bool:
-        """Remove a license for a user"""
+    def _remove_entry_internal(self, user_id: str, license_type: str, assignment_type: str) -> Optional[LicenseEntry]:
+        """Free a user's license slot without recording a change; returns the removed entry"""
         # Find the license entry to remove
         entry_to_remove = None
-        for entry in self.license_entries:
-            if (entry.user_id.lower() == user_id.lower() and 
-                entry.license_type == license_type and 
+        for entry in self._entries_by_user.get(user_id.lower(), ()):
+            if (entry.license_type == license_type and 
                 entry.assignment_type == assignment_type and 
                 entry.is_active):
                 entry_to_remove = entry
@@ -816,48 +1024,143 @@ class PolarionLicenseManager:
         
         if not entry_to_remove:
             logger.warning(f"No active {assignment_type} {license_type} license found for user {user_id}")
-            return False
+            return None
         
         # Mark as inactive
         entry_to_remove.is_active = False
+        slot_type = (license_type, assignment_type)
+        if entry_to_remove.index == self._max_slot_index.get(slot_type):
+            # The top slot was freed; find the new highest active index for this type
+            self._max_slot_index[slot_type] = max(
+                (entry.index for entry in self._entries_by_slot_type[slot_type] if entry.is_active),
+                default=0
+            )
+        self._invalidate_indexes()
+        
+        logger.info("Removed %s %s license for %s", assignment_type, license_type, user_id)
+        return entry_to_remove
+    
+    def _addition_change(self, user: User, entry: LicenseEntry) -> LicenseChange:
+        """Change record for a newly assigned license"""
+        return LicenseChange(
+            user_id=user.user_id,
+            user_name=user.full_name,
+            action='add',
+            new_license=f"{entry.assignment_type} {entry.license_type}",
+            line_added=f"{entry.assignment_type.lower()}{entry.license_type}User{entry.index}={user.user_id}"
+        )
+    
+    def add_user_license(self, user: User, license_type: str, assignment_type: str) -> bool:
+        """Add a license for a user"""
+        new_entry = self._add_entry_internal(user, license_type, assignment_type)
+        if not new_entry:
+            return False
         
         # Record change
-        user_name = self.users.get(user_id.lower(), User(user_id, user_id, '')).full_name
-        change = LicenseChange(
+        self.changes.append(self._addition_change(user, new_entry))
+        return True
+    
+    def add_user_licenses_bulk(self, users: Iterable[User], license_type: str, assignment_type: str) -> Tuple[List[User], List[User]]:
+        """Give several users the same license at once; returns the users added and those that already had one"""
+        added_users = []
+        failed_users = []
+        new_entries = []
+        for user in users:
+            new_entry = self._append_entry(user, license_type, assignment_type)
+            if new_entry:
+                added_users.append(user)
+                new_entries.append(new_entry)
+            else:
+                failed_users.append(user)
+        
+        if new_entries:
+            self._invalidate_indexes()
+            self.changes.extend([self._addition_change(user, entry) for user, entry in zip(added_users, new_entries)])
+            logger.info("Added %s %s licenses for %d users", assignment_type, license_type, len(new_entries))
+        return added_users, failed_users
+    
+    def _removal_change(self, user_id: str, license_type: str, assignment_type: str, index: int) -> LicenseChange:
+        """Change record for a license freed without a replacement"""
+        user = self.users.get(user_id.lower())
+        return LicenseChange(
             user_id=user_id,
-            user_name=user_name,
+            user_name=user.full_name if user else user_id,
             action='remove',
             old_license=f"{assignment_type} {license_type}",
-            line_removed=f"{assignment_type.lower()}{license_type}User{entry_to_remove.index}={user_id}"
+            line_removed=f"{assignment_type.lower()}{license_type}User{index}={user_id}"
         )
-        self.changes.append(change)
+    
+    def remove_user_license(self, user_id: str, license_type: str, assignment_type: str) -> bool:
+        """Remove a license for a user"""
+        removed_entry = self._remove_entry_internal(user_id, license_type, assignment_type)
+        if not removed_entry:
+            return False
         
-        logger.info(f"Removed {assignment_type} {license_type} license for {user_id}")
+        # Record change
+        self.changes.append(self._removal_change(user_id, license_type, assignment_type, removed_entry.index))
         return True
     
+    def remove_user_licenses_bulk(self, entries: Iterable[LicenseEntry]) -> List[LicenseEntry]:
+        """Remove several license entries at once; returns the entries that were active and are now removed"""
+        removed = []
+        touched_slot_types = set()
+        for entry in entries:
+            # Entries already inactive (or listed twice) are skipped
+            if entry.is_active:
+                entry.is_active = False
+                removed.append(entry)
+                touched_slot_types.add((entry.license_type, entry.assignment_type))
+        if not removed:
+            return removed
+        
+        # Recompute the highest active slot once per affected license type
+        for slot_type in touched_slot_types:
+            self._max_slot_index[slot_type] = max(
+                (entry.index for entry in self._entries_by_slot_type[slot_type] if entry.is_active),
+                default=0
+            )
+        self._invalidate_indexes()
+        
+        self.changes.extend([
+            self._removal_change(entry.user_id, entry.license_type, entry.assignment_type, entry.index)
+            for entry in removed
+        ])
+        
+        logger.info("Removed %d license entries", len(removed))
+        return removed
+    
     def switch_user_license(self, user: User, old_license_type: str, old_assignment_type: str, 
                            new_license_type: str, new_assignment_type: str) -> bool:
         """Switch a user's license from one type to another"""
         # Remove old license
-        if not self.remove_user_license(user.user_id, old_license_type, old_assignment_type):
+        removed_entry = self._remove_entry_internal(user.user_id, old_license_type, old_assignment_type)
+        if not removed_entry:
             return False
         
-        # Add new license
-        if not self.add_user_license(user, new_license_type, new_assignment_type):
+        # Add new license; if that fails the old license is still gone, so record the removal
+        new_entry = self._add_entry_internal(user, new_license_type, new_assignment_type)
+        if not new_entry:
+            self.changes.append(self._removal_change(user.user_id, old_license_type, old_assignment_type, removed_entry.index))
             return False
         
-        # Update the change record to reflect it's a switch
-        if self.changes:
-            self.changes[-2].action = 'switch'  # The remove action
-            self.changes[-1].action = 'switch'  # The add action
-        
-        logger.info(f"Switched {user.user_id} from {old_assignment_type} {old_license_type} to {new_assignment_type} {new_license_type}")
+        # Record both sides of the switch as a single change
+        self.changes.append(LicenseChange(
+            user_id=user.user_id,
+            user_name=user.full_name,
+            action='switch',
+            old_license=f"{old_assignment_type} {old_license_type}",
+            new_license=f"{new_assignment_type} {new_license_type}",
+            line_removed=f"{old_assignment_type.lower()}{old_license_type}User{removed_entry.index}={user.user_id}",
+            line_added=f"{new_assignment_type.lower()}{new_license_type}User{new_entry.index}={user.user_id}"
+        ))
+        
+        logger.info("Switched %s from %s %s to %s %s", user.user_id,
+                    old_assignment_type, old_license_type, new_assignment_type, new_license_type)
         return True
     
     def update_license_config_text(self) -> str:
         """Generate updated license configuration text"""
         lines = self.license_config_text.split('\n')
-        updated_lines = lines.copy()
         
         # Sort license entries by category, assignment type, and index
         sorted_entries = sorted(
@@ -868,10 +1171,7 @@ class PolarionLicenseManager:
         # Group entries by category and assignment type
         grouped_entries = {}
         for entry in sorted_entries:
-            key = (entry.license_type, entry.assignment_type)
-            if key not in grouped_entries:
-                grouped_entries[key] = []
-            grouped_entries[key].append(entry)
+            grouped_entries.setdefault((entry.license_type, entry.assignment_type), []).append(entry)
         
         # Rebuild the configuration text
         new_lines = []
@@ -882,65 +1182,79 @@ class PolarionLicenseManager:
             line_stripped = line.strip()
             
             # Keep section headers
-            if line_stripped.startswith('# ------------------------------- POLARION'):
+            if line_stripped.startswith(_SECTION_HEADER_PREFIX):
                 new_lines.append(line)
-                for category in self.license_categories:
-                    if category in line:
-                        current_category = category
-                        break
+                header_match = self._header_category_re.search(line)
+                if header_match:
+                    current_category = header_match.group(0)
                 continue
             
             # Keep assignment type headers
-            if line_stripped.startswith('# NAMED USERS:'):
+            header_match = _ASSIGNMENT_HEADER_RE.match(line_stripped)
+            if header_match:
                 new_lines.append(line)
-                current_assignment_type = 'Named'
-                continue
-            elif line_stripped.startswith('# CONCURRENT USERS:'):
-                new_lines.append(line)
-                current_assignment_type = 'Concurrent'
+                current_assignment_type = _ASSIGNMENT_HEADERS[header_match.group(1)]
                 continue
             
             # Skip old license assignment lines (we'll add them back properly)
             if current_category and current_assignment_type and '=' in line_stripped:
-                if re.match(r'(\w+User)(\d+)=(.+)', line_stripped.lstrip('#')):
+                if _ASSIGN_LINE_RE.match(line_stripped):
                     continue
             
             # Keep other lines (comments, empty lines, etc.)
             new_lines.append(line)
         
-        # Add license entries in proper order
+        # Work out where each group's lines go, then emit everything in one pass instead of
+        # inserting into the list (the inserted lines never affect where headers are).
+        # A single scan of the kept lines finds, per category, the last line naming it before
+        # the next divider, and the position of every subsection header
+        section_markers = {category: f"POLARION {category}" for category, _ in grouped_entries}
+        subsection_markers = {
+            assignment_type: f"# {assignment_type.upper()} USERS:" for _, assignment_type in grouped_entries
+        }
+        section_starts = dict.fromkeys(section_markers, -1)
+        open_sections = set(section_markers)
+        subsection_headers: Dict[str, List[int]] = {assignment_type: [] for assignment_type in subsection_markers}
+        
+        for i, line in enumerate(new_lines):
+            is_divider = line.startswith('# -------------------------------')
+            for category in tuple(open_sections):
+                if section_markers[category] in line:
+                    section_starts[category] = i
+                elif is_divider and section_starts[category] != -1:
+                    open_sections.discard(category)
+            for assignment_type, marker in subsection_markers.items():
+                if marker in line:
+                    subsection_headers[assignment_type].append(i)
+        
+        insertions: Dict[int, List[List[str]]] = {}
         for (category, assignment_type), entries in grouped_entries.items():
-            # Find the section for this category and assignment type
-            section_start = -1
-            section_end = -1
-            
-            for i, line in enumerate(new_lines):
-                if f"POLARION {category}" in line:
-                    section_start = i
-                elif section_start != -1 and line.startswith('# -------------------------------'):
-                    section_end = i
-                    break
+            section_start = section_starts[category]
+            if section_start == -1:
+                continue
             
-            if section_start != -1:
-                # Find the assignment type subsection
-                subsection_start = -1
-                for i in range(section_start, len(new_lines)):
-                    if f"# {assignment_type.upper()} USERS:" in new_lines[i]:
-                        subsection_start = i + 1
-                        break
-                
-                if subsection_start != -1:
-                    # Insert license entries
-                    for entry in entries:
-                        if entry.is_active:
-                            license_line = f"{assignment_type.lower()}{category}User{entry.index}={entry.user_id}"
-                        else:
-                            license_line = f"# {assignment_type.lower()}{category}User{entry.index}={entry.user_id} (removed)"
-                        
-                        new_lines.insert(subsection_start, license_line)
-                        subsection_start += 1
-        
-        return '\n'.join(new_lines)
+            # First subsection header at or after the section start
+            headers = subsection_headers[assignment_type]
+            position = bisect.bisect_left(headers, section_start)
+            if position == len(headers):
+                continue
+            subsection_header = headers[position]
+            
+            block = [
+                f"{assignment_type.lower()}{category}User{entry.index}={entry.user_id}" if entry.is_active
+                else f"# {assignment_type.lower()}{category}User{entry.index}={entry.user_id} (removed)"
+                for entry in entries
+            ]
+            # A later group sharing the same header ends up directly under it, ahead of earlier ones
+            insertions.setdefault(subsection_header, []).insert(0, block)
+        
+        output_lines = []
+        for i, line in enumerate(new_lines):
+            output_lines.append(line)
+            for block in insertions.get(i, ()):
+                output_lines.extend(block)
+        
+        return '\n'.join(output_lines)
     
     def generate_change_summary(self) -> str:
         """Generate a summary of all changes made"""
@@ -971,16 +1285,19 @@ class PolarionLicenseManager:
             summary.append("SWITCHED USERS:")
             # Group switch changes
             switch_groups = {}
+            switch_name_by_uid = {}
             for change in switched_users:
-                if change.user_id not in switch_groups:
-                    switch_groups[change.user_id] = {'old': None, 'new': None}
+                licenses = switch_groups.get(change.user_id)
+                if licenses is None:
+                    licenses = switch_groups[change.user_id] = {'old': None, 'new': None}
+                    switch_name_by_uid[change.user_id] = change.user_name
                 if change.old_license:
-                    switch_groups[change.user_id]['old'] = change.old_license
+                    licenses['old'] = change.old_license
                 if change.new_license:
-                    switch_groups[change.user_id]['new'] = change.new_license
+                    licenses['new'] = change.new_license
             
             for user_id, licenses in switch_groups.items():
-                user_name = next((c.user_name for c in switched_users if c.user_id == user_id), user_id)
+                user_name = switch_name_by_uid[user_id]
                 summary.append(f"  ~ {user_name} ({user_id}) - {licenses['old']} → {licenses['new']}")
             summary.append("")
         
@@ -991,16 +1308,16 @@ class PolarionLicenseManager:
         """Validate proposed changes for potential issues"""
         errors = []
         
-        # Check for duplicate active licenses per user
+        # Check for duplicate active licenses per user. The combined table is cached until
+        # users or entries change and only ever holds active entries, so a length check suffices
         user_licenses = self.build_combined_user_license_table()
         for user_id, entries in user_licenses.items():
-            active_entries = [e for e in entries if e.is_active]
-            if len(active_entries) > 1:
-                errors.append(f"User {user_id} has multiple active licenses: {[f'{e.assignment_type} {e.license_type}' for e in active_entries]}")
+            if len(entries) > 1:
+                errors.append(f"User {user_id} has multiple active licenses: {[f'{e.assignment_type} {e.license_type}' for e in entries]}")
         
         # Check for invalid license assignments
         for entry in self.license_entries:
-            if entry.is_active and entry.user_id.lower() not in self.users:
+            if entry.is_active and entry.user_id_lower not in self.users:
                 errors.append(f"Active license for non-existent user: {entry.user_id}")
         
         return errors
@@ -1009,20 +1326,7 @@ class PolarionLicenseManager:
         """Automatically detect and read Excel or CSV file and convert to license configuration format"""
         try:
             # Automatically detect file type and read
-            if file_path.lower().endswith('.csv'):
-                df = pd.read_csv(file_path)
-                file_type = "CSV"
-            elif file_path.lower().endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(file_path)
-                file_type = "Excel"
-            else:
-                # Try to read as CSV first, then Excel
-                try:
-                    df = pd.read_csv(file_path)
-                    file_type = "CSV"
-                except:
-                    df = pd.read_excel(file_path)
-                    file_type = "Excel"
+            df, file_type = self._read_table(file_path)
             
             print(f"Successfully detected and read {file_type} file: {file_path} sharon")
             print(f"Found {len(df)} rows in the file")
@@ -1035,18 +1339,38 @@ class PolarionLicenseManager:
             config_lines.append(f"# Generated from {file_type} file: {file_path}")
             config_lines.append("")
             
-            # Process each row
-            for index, row in df.iterrows():
-                # Try different possible column names (case-insensitive)
-                license_type = str(row.get('License_Type', row.get('license_type', row.get('LicenseType', ''))))
-                assignment_type = str(row.get('Assignment_Type', row.get('assignment_type', row.get('AssignmentType', ''))))
-                user_id = str(row.get('User_ID', row.get('user_id', row.get('UserID', ''))))
-                license_index = str(row.get('Index', row.get('index', '')))
-                
-                if license_type and assignment_type and user_id:
-                    # Format: concurrentALMUser1=user_id
-                    config_line = f"{assignment_type.lower()}{license_type}User{license_index}={user_id}"
-                    config_lines.append(config_line)
+            # Resolve each field's column once (case-insensitive), then build all lines at once
+            columns_by_lower = {}
+            for column in df.columns:
+                columns_by_lower.setdefault(str(column).lower(), column)
+            
+            resolved_columns = {
+                field_name: next((columns_by_lower[alias] for alias in aliases if alias in columns_by_lower), None)
+                for field_name, aliases in _LICENSE_TABLE_COLUMNS.items()
+            }
+            
+            # Without these columns every row would be skipped, so there is nothing to build
+            missing = [name for name in ('license_type', 'assignment_type', 'user_id') if resolved_columns[name] is None]
+            if missing:
+                logger.warning(f"No {', '.join(missing)} column found in {file_path}; no license lines generated")
+                return '\n'.join(config_lines)
+            
+            def field_values(field_name):
+                column = resolved_columns[field_name]
+                return df[column].astype(str) if column is not None else pd.Series('', index=df.index, dtype=object)
+            
+            license_types = field_values('license_type')
+            assignment_types = field_values('assignment_type')
+            user_ids = field_values('user_id')
+            license_indexes = field_values('index')
+            
+            # Rows missing a license type, assignment type or user are skipped
+            complete = (license_types != '') & (assignment_types != '') & (user_ids != '')
+            
+            # Format: concurrentALMUser1=user_id
+            config_lines.extend(
+                (assignment_types.str.lower() + license_types + 'User' + license_indexes + '=' + user_ids)[complete].tolist()
+            )
             
             return '\n'.join(config_lines)
             
@@ -1058,10 +1382,13 @@ class PolarionLicenseManager:
         """Create a backup of the original configuration"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         backup_filename = f"polarion_license_backup_{timestamp}.txt"
+        data = self.license_config_text.encode('utf-8')
+        if len(data) > BACKUP_COMPRESS_THRESHOLD:
+            backup_filename += '.gz'
+            data = gzip.compress(data, compresslevel=1)
         
         try:
-            with open(backup_filename, 'w', encoding='utf-8') as f:
-                f.write(self.license_config_text)
+            _write_atomically(backup_filename, [data])
             logger.info(f"Backup created: {backup_filename}")
             return backup_filename
         except Exception as e:
@@ -1078,18 +1405,22 @@ class PolarionLicenseManager:
         Returns:
             Dictionary with keys 'user_ids', 'full_names', 'emails' containing categorized lists
         """
-        # First, normalize separators to commas, then split
-        normalized_input = input_text.replace(';', ',')
-        
-        # Split by comma and clean up identifiers (remove whitespace and empty strings)
-        identifiers = [id.strip() for id in normalized_input.split(',') if id.strip()]
-        
         # Categorize identifiers
         user_ids = []
         full_names = []
         emails = []
         
-        for identifier in identifiers:
+        # Normalize separators to commas, then split, strip and classify in a single pass
+        # (str.replace/split/strip all run in C; empty pieces are skipped). A lone identifier,
+        # the common case, skips the replace and split entirely
+        if ',' in input_text or ';' in input_text:
+            pieces = input_text.replace(';', ',').split(',')
+        else:
+            pieces = (input_text,)
+        
+        for identifier in map(str.strip, pieces):
+            if not identifier:
+                continue
             # Check if it's a compound identifier (contains both name and email)
             if ' ' in identifier and '@' in identifier:
                 # Try to extract name and email from compound identifier
@@ -1114,7 +1445,7 @@ class PolarionLicenseManager:
             elif '@' in identifier and '.' in identifier:
                 emails.append(identifier)
             # Check if it's a user_id (no spaces, typically alphanumeric with possible dots/underscores)
-            elif ' ' not in identifier and identifier.replace('.', '').replace('_', '').replace('-', '').isalnum():
+            elif _USER_ID_TOKEN_RE.fullmatch(identifier):
                 user_ids.append(identifier)
             # Otherwise, treat as full name
             else:
@@ -1138,49 +1469,482 @@ class PolarionLicenseManager:
         """
         categorized = self.parse_mixed_identifiers(input_text)
         found_users = []
-        processed_identifiers = set()  # To avoid duplicates
-        
-        # Process user_ids
-        for user_id in categorized['user_ids']:
-            if user_id not in processed_identifiers:
-                user = self.find_user_by_identifier(user_id)
-                if user:
-                    found_users.append(user)
-                    processed_identifiers.add(user_id)
-        
-        # Process emails
-        for email in categorized['emails']:
-            if email not in processed_identifiers:
-                user = self.find_user_by_identifier(email)
-                if user:
-                    found_users.append(user)
-                    processed_identifiers.add(email)
-        
-        # Process full names
-        for full_name in categorized['full_names']:
-            if full_name not in processed_identifiers:
-                user = self.find_user_by_identifier(full_name)
-                if user:
-                    found_users.append(user)
-                    processed_identifiers.add(full_name)
+        # Skip identifiers that normalize to one already looked up, and users already found
+        # through another identifier (e.g. both their user id and their email)
+        seen_identifiers = set()
+        seen_users = set()
+        
+        for identifier in itertools.chain(categorized['user_ids'], categorized['emails'], categorized['full_names']):
+            identifier_key = identifier.strip().lower()
+            if identifier_key in seen_identifiers:
+                continue
+            seen_identifiers.add(identifier_key)
+            
+            user = self.find_user_by_identifier(identifier)
+            if user and user.user_id_lower not in seen_users:
+                seen_users.add(user.user_id_lower)
+                found_users.append(user)
         
         return found_users
 
+def _write_atomically(path: str, chunks: List[bytes]) -> None:
+    """Write chunks to path through a synced temporary file renamed into place, so the file is never half-written"""
+    tmp_path = path + '.tmp'
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+    try:
+        try:
+            # One gathered write where available; finish any short write piece by piece
+            written = os.writev(fd, chunks) if hasattr(os, 'writev') else 0
+            if written < sum(map(len, chunks)):
+                remaining = memoryview(b''.join(chunks))[written:]
+                while remaining:
+                    remaining = remaining[os.write(fd, remaining):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def _print_categorized(categorized: Dict[str, List[str]]):
+    """Show how parse_mixed_identifiers split the input, in one write"""
+    lines = ["\nParsed identifiers:"]
+    for key, label in (('user_ids', 'User IDs'), ('full_names', 'Full Names'), ('emails', 'Emails')):
+        if categorized[key]:
+            lines.append(f"  {label}: {', '.join(categorized[key])}")
+    print('\n'.join(lines))
+
+def prompt_int(prompt: str, low: int, high: Optional[int] = None) -> int:
+    """Ask for a whole number in [low, high] (no upper bound if high is None), re-asking until valid"""
+    while True:
+        try:
+            value = int(input(prompt).strip())
+        except ValueError:
+            value = None
+        if value is not None and value >= low and (high is None or value <= high):
+            return value
+        if high is None:
+            print(f"Please enter a whole number of at least {low}.")
+        else:
+            print(f"Please enter a number between {low} and {high}.")
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse optional command-line inputs that replace the interactive setup prompts"""
+    parser = argparse.ArgumentParser(description='Polarion License Management Automation Tool')
+    parser.add_argument('--config-file', help='Read the license configuration from this file instead of prompting')
+    parser.add_argument('--users-file', help='Load users from this CSV/Excel file instead of prompting')
+    return parser.parse_args(argv)
+
+def _menu_query_licenses(manager: PolarionLicenseManager):
+    """Menu option 1: query user license status"""
+    print("\n--- QUERY USER LICENSE STATUS ---")
+    
+    # Show database status if no users loaded
+    if not manager.users:
+        print("Warning: No users loaded from database.")
+        print("Please ensure database connection is established and users are fetched.")
+        return
+    
+    identifiers_input = input("Enter user identifiers (comma or semicolon separated, can mix user IDs, names, emails): ").strip()
+    
+    # Parse and categorize the input
+    categorized = manager.parse_mixed_identifiers(identifiers_input)
+    _print_categorized(categorized)
+    
+    # Get all identifiers as a flat list for processing
+    all_identifiers = categorized['user_ids'] + categorized['full_names'] + categorized['emails']
+    
+    results, stats = manager.query_user_licenses(all_identifiers)
+    
+    print("Results:")
+    
+    # Print individual user results first (no extra spaces)
+    for result in results:
+        print(f"{result['message']}")
+    
+    # After all individual user results, print the aggregate and overall stats once
+    # Check if any user was found with licenses to decide if stats should be printed
+    if any(r['status'] == 'has_license' for r in results):
+        print("\nLicense Allocations for Specified Users")
+        print(f"{stats['user_stats_message']}")
+        
+        print("\nOverall License Statistics:")
+        print(f"{stats['overall_stats_message']}")
+    print()
+
+def _menu_inactive_users(manager: PolarionLicenseManager):
+    """Menu option 2: list inactive users with licenses"""
+    print("\n--- INACTIVE USERS WITH LICENSES ---")
+    inactive_entries = manager.find_inactive_users_with_licenses()
+    
+    if not inactive_entries:
+        print("No inactive users with licenses found.")
+    else:
+        print(f"Found {len(inactive_entries)} inactive users with licenses:")
+        print('\n'.join(f"  - {entry.user_id} - {entry.assignment_type} {entry.license_type}" for entry in inactive_entries))
+        
+        remove_inactive = input("\nDo you want to remove these inactive users? (y/n): ").lower().strip()
+        if remove_inactive == 'y':
+            manager.remove_user_licenses_bulk(inactive_entries)
+            print("Inactive users removed from licenses.")
+
+def _menu_add_users(manager: PolarionLicenseManager):
+    """Menu option 3: add user(s) to a license"""
+    print("\n--- ADD USER(S) TO LICENSE ---")
+    
+    # Show database status if no users loaded
+    if not manager.users:
+        print("Warning: No users loaded from database.")
+        print("Please ensure database connection is established and users are fetched.")
+        return
+    
+    print("Choose input method:")
+    print("1. Enter multiple users at once (comma or semicolon separated)")
+    print("2. Enter users one by one")
+    
+    input_method = input("Select method (1-2): ").strip()
+    
+    if input_method == '1':
+        # Multiple users at once
+        identifiers_input = input("Enter user identifiers (comma or semicolon separated, can mix user IDs, names, emails): ").strip()
+        
+        # Parse and categorize the input
+        categorized = manager.parse_mixed_identifiers(identifiers_input)
+        _print_categorized(categorized)
+        
+        # Get all identifiers as a flat list for processing
+        all_identifiers = categorized['user_ids'] + categorized['full_names'] + categorized['emails']
+        
+        # Find all users
+        found_users, missing_identifiers = manager.resolve_identifiers(all_identifiers)
+        for identifier in missing_identifiers:
+            print(f"User '{identifier}' not found. Skipping.")
+        
+        if not found_users:
+            print("No valid users found. Exiting.")
+            return
+        
+        print(f"\nFound {len(found_users)} users:")
+        for user in found_users:
+            print(f"  - {user.full_name} ({user.email})")
+        
+        # Get license type and assignment type for all users
+        print("\nAvailable license types:")
+        print(manager.category_menu)
+        
+        category_count = len(manager.category_choices)
+        license_choice = prompt_int(f"Select license type (1-{category_count}): ", 1, category_count)
+        license_type = manager.category_choices[license_choice - 1]
+        
+        print("Assignment type:")
+        print(manager.assignment_menu)
+        assignment_count = len(manager.assignment_types)
+        assignment_choice = prompt_int(f"Select assignment type (1-{assignment_count}): ", 1, assignment_count)
+        assignment_type = manager.assignment_types[assignment_choice - 1]
+        
+        # Add licenses for all found users
+        added_users, failed_users = manager.add_user_licenses_bulk(found_users, license_type, assignment_type)
+        # added_users keeps the order of found_users, so walk both together (a user listed
+        # twice is only added the first time)
+        pending_added = iter(added_users)
+        next_added = next(pending_added, None)
+        for user in found_users:
+            if user is next_added:
+                print(f"Added {assignment_type} {license_type} license for {user.user_id}")
+                next_added = next(pending_added, None)
+            else:
+                print(f"Failed to add license for {user.user_id}")
+        
+        print(f"\nSuccessfully added licenses for {len(added_users)} out of {len(found_users)} users.")
+        
+    else:
+        # Individual users
+        num_users = prompt_int("How many users to add? ", 0)
+        
+        # The choices and prompts are the same for every user
+        category_choices = manager.category_choices
+        assignment_types = manager.assignment_types
+        license_prompt = f"Select license type (1-{len(category_choices)}): "
+        assignment_prompt = f"Select assignment type (1-{len(assignment_types)}): "
+        
+        for i in range(num_users):
+            print(f"\nUser {i+1}:")
+            identifier = input("Enter user identifier (name/email/ID): ").strip()
+            user = manager.find_user_by_identifier(identifier)
+            
+            if not user:
+                print(f"User '{identifier}' not found. Skipping.")
+                continue
+            
+            print(f"Found user: {user.full_name} ({user.email})")
+            
+            print("Available license types:")
+            print(manager.category_menu)
+            
+            license_choice = prompt_int(license_prompt, 1, len(category_choices))
+            license_type = category_choices[license_choice - 1]
+            
+            print("Assignment type:")
+            print(manager.assignment_menu)
+            assignment_choice = prompt_int(assignment_prompt, 1, len(assignment_types))
+            assignment_type = assignment_types[assignment_choice - 1]
+            
+            if manager.add_user_license(user, license_type, assignment_type):
+                print(f"Added {assignment_type} {license_type} license for {user.user_id}")
+            else:
+                print(f"Failed to add license for {user.user_id}")
+
+def _menu_remove_users(manager: PolarionLicenseManager):
+    """Menu option 4: remove user(s) from a license"""
+    print("\n--- REMOVE USER(S) FROM LICENSE ---")
+    identifiers_input = input("Enter user identifiers to remove (comma or semicolon separated, can mix user IDs, names, emails): ").strip()
+    
+    # Parse and categorize the input
+    categorized = manager.parse_mixed_identifiers(identifiers_input)
+    _print_categorized(categorized)
+    
+    # Get all identifiers as a flat list for processing
+    identifiers = categorized['user_ids'] + categorized['full_names'] + categorized['emails']
+    
+    user_licenses = manager.build_combined_user_license_table()
+    
+    # Pick the licenses to remove first, then remove them all in one batch
+    to_remove = []
+    for identifier in identifiers:
+        user = manager.find_user_by_identifier(identifier)
+        if not user:
+            print(f"User '{identifier}' not found. Skipping.")
+            continue
+        
+        user_entries = user_licenses.get(user.user_id_lower, [])
+        if not user_entries:
+            print(f"User '{identifier}' has no licenses. Skipping.")
+            continue
+        
+        print(f"\nUser: {user.full_name} ({user.email})")
+        print("Current licenses:")
+        for j, entry in enumerate(user_entries, 1):
+            print(f"  {j}. {entry.assignment_type} {entry.license_type}")
+        
+        if len(user_entries) == 1:
+            to_remove.append(user_entries[0])
+        else:
+            remove_choice = prompt_int("Select license to remove (1-{}): ".format(len(user_entries)), 1, len(user_entries))
+            to_remove.append(user_entries[remove_choice - 1])
+    
+    for entry in manager.remove_user_licenses_bulk(to_remove):
+        print(f"Removed {entry.assignment_type} {entry.license_type} license for {entry.user_id}")
+
+def _menu_switch_license(manager: PolarionLicenseManager):
+    """Menu option 5: switch a user's license type"""
+    print("\n--- SWITCH USER LICENSE TYPE ---")
+    identifier = input("Enter user identifier: ").strip()
+    user = manager.find_user_by_identifier(identifier)
+    
+    if not user:
+        print(f"User '{identifier}' not found.")
+        return
+    
+    user_licenses = manager.build_combined_user_license_table()
+    user_entries = user_licenses.get(user.user_id_lower, [])
+    
+    if not user_entries:
+        print(f"User '{identifier}' has no licenses to switch.")
+        return
+    
+    print(f"User: {user.full_name} ({user.email})")
+    print("Current licenses:")
+    for j, entry in enumerate(user_entries, 1):
+        print(f"  {j}. {entry.assignment_type} {entry.license_type}")
+    
+    old_choice = prompt_int("Select license to switch from (1-{}): ".format(len(user_entries)), 1, len(user_entries))
+    
+    old_entry = user_entries[old_choice - 1]
+    
+    print("New license type:")
+    print(manager.category_menu)
+    
+    category_count = len(manager.category_choices)
+    new_license_choice = prompt_int(f"Select new license type (1-{category_count}): ", 1, category_count)
+    new_license_type = manager.category_choices[new_license_choice - 1]
+    
+    print("New assignment type:")
+    print(manager.assignment_menu)
+    assignment_count = len(manager.assignment_types)
+    new_assignment_choice = prompt_int(f"Select new assignment type (1-{assignment_count}): ", 1, assignment_count)
+    new_assignment_type = manager.assignment_types[new_assignment_choice - 1]
+    
+    if manager.switch_user_license(user, old_entry.license_type, old_entry.assignment_type, 
+                                new_license_type, new_assignment_type):
+        print(f"Switched {user.user_id} from {old_entry.assignment_type} {old_entry.license_type} to {new_assignment_type} {new_license_type}")
+
+def _menu_show_summary(manager: PolarionLicenseManager):
+    """Menu option 6: show the current license summary"""
+    print("\n--- CURRENT LICENSE SUMMARY ---")
+    user_licenses = manager.build_combined_user_license_table()
+    
+    # The table only holds active entries; stale ids (not in manager.users) show the id as name
+    print("Active Users with Licenses:")
+    users = manager.users
+    active_lines = []
+    for user_id, entries in user_licenses.items():
+        if entries:
+            user = users.get(user_id)
+            full_name, email = (user.full_name, user.email) if user else (user_id, '')
+            active_lines.append(f"  {full_name} ({email}) - {'; '.join(f'{e.assignment_type} {e.license_type}' for e in entries)}")
+    if active_lines:
+        print('\n'.join(active_lines))
+    
+    print("\nInactive Users with Licenses:")
+    inactive_entries = manager.find_inactive_users_with_licenses()
+    if inactive_entries:
+        print('\n'.join(f"  {entry.user_id} - {entry.assignment_type} {entry.license_type}" for entry in inactive_entries))
+
+def _menu_apply_changes(manager: PolarionLicenseManager):
+    """Menu option 7: apply changes and write the output files"""
+    print("\n--- APPLY CHANGES AND GENERATE OUTPUT ---")
+    
+    if not manager.changes:
+        print("No changes to apply.")
+        return
+    
+    # Validate changes
+    errors = manager.validate_changes()
+    if errors:
+        print("Validation errors found:")
+        for error in errors:
+            print(f"  - {error}")
+        return
+    
+    # Show change summary (kept for the summary file below)
+    change_summary = manager.generate_change_summary()
+    print(change_summary)
+    
+    confirm = input("\nApply these changes? (y/n): ").lower().strip()
+    if confirm != 'y':
+        print("Changes cancelled.")
+        return
+    
+    # Generate updated configuration
+    updated_config = manager.update_license_config_text()
+    
+    # Save to file
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_filename = f"polarion_license_updated_{timestamp}.txt"
+    
+    # Encode once; the summary file reuses the same configuration bytes
+    config_bytes = updated_config.encode('utf-8')
+    try:
+        _write_atomically(output_filename, [config_bytes])
+        print(f"\nUpdated license configuration saved to: {output_filename}")
+        
+        # Also save change summary
+        summary_filename = f"polarion_license_changes_{timestamp}.txt"
+        _write_atomically(summary_filename, [
+            change_summary.encode('utf-8'),
+            b"\n\n=== UPDATED LICENSE CONFIGURATION ===\n\n",
+            config_bytes
+        ])
+        print(f"Complete change summary saved to: {summary_filename}")
+        
+    except Exception as e:
+        print(f"Error saving files: {e}")
+    
+    # Clear changes after successful application
+    manager.changes.clear()
+
+def _menu_database_status(manager: PolarionLicenseManager):
+    """Menu option 8: database status, refresh or load users"""
+    print("\n--- DATABASE STATUS ---")
+    print(manager.get_database_status())
+    
+    if manager.db_pool:
+        # Offer to refresh users
+        refresh = input("\nDo you want to refresh user data from database? (y/n): ").lower().strip()
+        if refresh == 'y':
+            if manager.fetch_active_users():
+                print(f"Successfully refreshed {len(manager.users)} users from database.")
+            else:
+                print("Failed to refresh users from database.")
+    else:
+        # Offer to load users from file
+        load_from_file = input("\nDo you want to load users from a file? (y/n): ").lower().strip()
+        if load_from_file == 'y':
+            user_file = input("Enter path to user file (CSV/Excel): ").strip().strip('"').strip("'")
+            if manager.load_users_from_file(user_file):
+                print(f"Successfully loaded {len(manager.users)} users from file.")
+            else:
+                print("Failed to load users from file.")
+
+def _menu_exit(manager: PolarionLicenseManager) -> bool:
+    """Menu option 9: offer to save pending changes, then exit"""
+    if manager.changes:
+        print("Warning: You have unsaved changes!")
+        save_changes = input("Save changes before exiting? (y/n): ").lower().strip()
+        if save_changes == 'y':
+            # Apply the same logic as option 7
+            updated_config = manager.update_license_config_text()
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_filename = f"polarion_license_updated_{timestamp}.txt"
+            
+            try:
+                _write_atomically(output_filename, [updated_config.encode('utf-8')])
+                print(f"Updated license configuration saved to: {output_filename}")
+            except Exception as e:
+                print(f"Error saving file: {e}")
+    
+    manager.close_database()
+    print("Exiting Polarion License Manager.")
+    return True
+
+# Main menu choices; a handler returns True to leave the menu loop
+MENU_HANDLERS = {
+    '1': _menu_query_licenses,
+    '2': _menu_inactive_users,
+    '3': _menu_add_users,
+    '4': _menu_remove_users,
+    '5': _menu_switch_license,
+    '6': _menu_show_summary,
+    '7': _menu_apply_changes,
+    '8': _menu_database_status,
+    '9': _menu_exit,
+}
+
 def main():
     """Main interactive interface"""
+    args = parse_arguments()
+    
     print("=" * 60)
     print("POLARION LICENSE MANAGEMENT AUTOMATION TOOL")
     print("=" * 60)
     
     manager = PolarionLicenseManager()
     
+    # When both files are given up front (as the web application does), parse a plain
+    # text configuration file on a worker thread while the users file is loading
+    config_future = None
+    if args.users_file and args.config_file:
+        config_path = args.config_file.strip().strip('"').strip("'")
+        if not config_path.lower().endswith(('.csv', '.xlsx', '.xls')):
+            config_executor = ThreadPoolExecutor(max_workers=1)
+            config_future = config_executor.submit(manager.parse_license_configuration_file, config_path)
+            # The worker thread exits once the parse is done
+            config_executor.shutdown(wait=False)
+    
     # Database connection setup
     print("\n1. DATABASE CONNECTION SETUP")
     print("-" * 30)
     
-    use_database = input("Do you want to connect to Polarion database? (y/n): ").lower().strip()
-    
-    if use_database == 'y':
+    if args.users_file:
+        if manager.load_users_from_file(args.users_file):
+            print(f"Successfully loaded {len(manager.users)} users from file.")
+        else:
+            print("Failed to load users from file.")
+    elif input("Do you want to connect to Polarion database? (y/n): ").lower().strip() == 'y':
         host = input("Database host (default: localhost): ").strip() or "localhost"
         port = input("Database port (default: 5432): ").strip() or "5432"
         database = input("Database name: ").strip()
@@ -1237,10 +2001,11 @@ def main():
     print("\n2. LICENSE CONFIGURATION INPUT")
     print("-" * 30)
     
-    config_source = input("Enter license configuration from (file/excel/paste) or provide file path directly: ").strip()
+    config_text = None
+    config_source = args.config_file or input("Enter license configuration from (file/excel/paste) or provide file path directly: ").strip()
     
     # Check if user provided a file path directly
-    if config_source.lower().endswith(('.csv', '.xlsx', '.xls')) or '\\' in config_source or '/' in config_source:
+    if args.config_file or config_source.lower().endswith(('.csv', '.xlsx', '.xls')) or '\\' in config_source or '/' in config_source:
         # User provided a file path directly
         filename = config_source.strip().strip('"').strip("'")
         try:
@@ -1248,18 +2013,19 @@ def main():
                 # It's an Excel/CSV file
                 config_text = manager.read_excel_or_csv_file(filename)
                 print(f"Generated configuration with {len(config_text.split(chr(10)))} lines")
+            elif config_future is not None:
+                # Already being parsed in the background
+                config_future.result()
             else:
-                # Try as regular text file
-                with open(filename, 'r', encoding='utf-8') as f:
-                    config_text = f.read()
+                # Try as regular text file, parsed as it is read
+                manager.parse_license_configuration_file(filename)
         except Exception as e:
             print(f"Error reading file: {e}")
             return
     elif config_source.lower() == 'file':
         filename = input("Enter filename: ").strip().strip('"').strip("'")
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                config_text = f.read()
+            manager.parse_license_configuration_file(filename)
         except Exception as e:
             print(f"Error reading file: {e}")
             return
@@ -1282,7 +2048,7 @@ def main():
             pass
         config_text = '\n'.join(config_lines)
     
-    if not manager.parse_license_configuration(config_text):
+    if config_text is not None and not manager.parse_license_configuration(config_text):
         print("Failed to parse license configuration.")
         return
     
@@ -1308,392 +2074,21 @@ def main():
         
         choice = input("\nSelect option (1-9): ").strip()
         
-        if choice == '1':
-            # Query user licenses
-            print("\n--- QUERY USER LICENSE STATUS ---")
-            
-            # Show database status if no users loaded
-            if not manager.users:
-                print("Warning: No users loaded from database.")
-                print("Please ensure database connection is established and users are fetched.")
-                continue
-            
-            identifiers_input = input("Enter user identifiers (comma or semicolon separated, can mix user IDs, names, emails): ").strip()
-            
-            # Parse and categorize the input
-            categorized = manager.parse_mixed_identifiers(identifiers_input)
-            print(f"\nParsed identifiers:")
-            if categorized['user_ids']:
-                print(f"  User IDs: {', '.join(categorized['user_ids'])}")
-            if categorized['full_names']:
-                print(f"  Full Names: {', '.join(categorized['full_names'])}")
-            if categorized['emails']:
-                print(f"  Emails: {', '.join(categorized['emails'])}")
-            
-            # Get all identifiers as a flat list for processing
-            all_identifiers = categorized['user_ids'] + categorized['full_names'] + categorized['emails']
-            
-            results = manager.query_user_licenses(all_identifiers)
-            
-            print("Results:")
-            
-            # Print individual user results first (no extra spaces)
-            for result in results:
-                print(f"{result['message']}")
-            
-            # After all individual user results, print the aggregate and overall stats once
-            # Check if any user was found with licenses to decide if stats should be printed
-            if results and any(r['status'] == 'has_license' for r in results):
-                # Get the stats from the first 'has_license' result (they should be the same for all)
-                first_has_license_result = next((r for r in results if r['status'] == 'has_license'), None)
-                if first_has_license_result:
-                    print("\nLicense Allocations for Specified Users")
-                    print(f"{first_has_license_result['user_stats_message']}")
-                    
-                    print("\nOverall License Statistics:")
-                    print(f"{first_has_license_result['overall_stats_message']}")
-            print()
-        
-        elif choice == '2':
-            # List inactive users
-            print("\n--- INACTIVE USERS WITH LICENSES ---")
-            inactive_entries = manager.find_inactive_users_with_licenses()
-            
-            if not inactive_entries:
-                print("No inactive users with licenses found.")
-            else:
-                print(f"Found {len(inactive_entries)} inactive users with licenses:")
-                for entry in inactive_entries:
-                    print(f"  - {entry.user_id} - {entry.assignment_type} {entry.license_type}")
-                
-                remove_inactive = input("\nDo you want to remove these inactive users? (y/n): ").lower().strip()
-                if remove_inactive == 'y':
-                    for entry in inactive_entries:
-                        manager.remove_user_license(entry.user_id, entry.license_type, entry.assignment_type)
-                    print("Inactive users removed from licenses.")
-        
-        elif choice == '3':
-            # Add users
-            print("\n--- ADD USER(S) TO LICENSE ---")
-            
-            # Show database status if no users loaded
-            if not manager.users:
-                print("Warning: No users loaded from database.")
-                print("Please ensure database connection is established and users are fetched.")
-                continue
-            
-            print("Choose input method:")
-            print("1. Enter multiple users at once (comma or semicolon separated)")
-            print("2. Enter users one by one")
-            
-            input_method = input("Select method (1-2): ").strip()
-            
-            if input_method == '1':
-                # Multiple users at once
-                identifiers_input = input("Enter user identifiers (comma or semicolon separated, can mix user IDs, names, emails): ").strip()
-                
-                # Parse and categorize the input
-                categorized = manager.parse_mixed_identifiers(identifiers_input)
-                print(f"\nParsed identifiers:")
-                if categorized['user_ids']:
-                    print(f"  User IDs: {', '.join(categorized['user_ids'])}")
-                if categorized['full_names']:
-                    print(f"  Full Names: {', '.join(categorized['full_names'])}")
-                if categorized['emails']:
-                    print(f"  Emails: {', '.join(categorized['emails'])}")
-                
-                # Get all identifiers as a flat list for processing
-                all_identifiers = categorized['user_ids'] + categorized['full_names'] + categorized['emails']
-                
-                # Find all users
-                found_users = []
-                for identifier in all_identifiers:
-                    user = manager.find_user_by_identifier(identifier)
-                    if user:
-                        found_users.append(user)
-                    else:
-                        print(f"User '{identifier}' not found. Skipping.")
-                
-                if not found_users:
-                    print("No valid users found. Exiting.")
-                    continue
-                
-                print(f"\nFound {len(found_users)} users:")
-                for user in found_users:
-                    print(f"  - {user.full_name} ({user.email})")
-                
-                # Get license type and assignment type for all users
-                print("\nAvailable license types:")
-                for j, category in enumerate(manager.license_categories.keys(), 1):
-                    print(f"  {j}. {category}")
-                
-                license_choice = int(input("Select license type (1-5): ").strip())
-                license_type = list(manager.license_categories.keys())[license_choice - 1]
-                
-                print("Assignment type:")
-                print("  1. Named")
-                print("  2. Concurrent")
-                assignment_choice = int(input("Select assignment type (1-2): ").strip())
-                assignment_type = manager.assignment_types[assignment_choice - 1]
-                
-                # Add licenses for all found users
-                success_count = 0
-                for user in found_users:
-                    if manager.add_user_license(user, license_type, assignment_type):
-                        print(f"Added {assignment_type} {license_type} license for {user.user_id}")
-                        success_count += 1
-                    else:
-                        print(f"Failed to add license for {user.user_id}")
-                
-                print(f"\nSuccessfully added licenses for {success_count} out of {len(found_users)} users.")
-                
-            else:
-                # Individual users
-                num_users = int(input("How many users to add? ").strip())
-                
-                for i in range(num_users):
-                    print(f"\nUser {i+1}:")
-                    identifier = input("Enter user identifier (name/email/ID): ").strip()
-                    user = manager.find_user_by_identifier(identifier)
-                    
-                    if not user:
-                        print(f"User '{identifier}' not found. Skipping.")
-                        continue
-                    
-                    print(f"Found user: {user.full_name} ({user.email})")
-                    
-                    print("Available license types:")
-                    for j, category in enumerate(manager.license_categories.keys(), 1):
-                        print(f"  {j}. {category}")
-                    
-                    license_choice = int(input("Select license type (1-5): ").strip())
-                    license_type = list(manager.license_categories.keys())[license_choice - 1]
-                    
-                    print("Assignment type:")
-                    print("  1. Named")
-                    print("  2. Concurrent")
-                    assignment_choice = int(input("Select assignment type (1-2): ").strip())
-                    assignment_type = manager.assignment_types[assignment_choice - 1]
-                    
-                    if manager.add_user_license(user, license_type, assignment_type):
-                        print(f"Added {assignment_type} {license_type} license for {user.user_id}")
-                    else:
-                        print(f"Failed to add license for {user.user_id}")
-        
-        elif choice == '4':
-            # Remove users
-            print("\n--- REMOVE USER(S) FROM LICENSE ---")
-            identifiers_input = input("Enter user identifiers to remove (comma or semicolon separated, can mix user IDs, names, emails): ").strip()
-            
-            # Parse and categorize the input
-            categorized = manager.parse_mixed_identifiers(identifiers_input)
-            print(f"\nParsed identifiers:")
-            if categorized['user_ids']:
-                print(f"  User IDs: {', '.join(categorized['user_ids'])}")
-            if categorized['full_names']:
-                print(f"  Full Names: {', '.join(categorized['full_names'])}")
-            if categorized['emails']:
-                print(f"  Emails: {', '.join(categorized['emails'])}")
-            
-            # Get all identifiers as a flat list for processing
-            identifiers = categorized['user_ids'] + categorized['full_names'] + categorized['emails']
-            
-            user_licenses = manager.build_combined_user_license_table()
-            
-            for identifier in identifiers:
-                user = manager.find_user_by_identifier(identifier)
-                if not user:
-                    print(f"User '{identifier}' not found. Skipping.")
-                    continue
-                
-                user_entries = user_licenses.get(user.user_id.lower(), [])
-                if not user_entries:
-                    print(f"User '{identifier}' has no licenses. Skipping.")
-                    continue
-                
-                print(f"\nUser: {user.full_name} ({user.email})")
-                print("Current licenses:")
-                for j, entry in enumerate(user_entries, 1):
-                    print(f"  {j}. {entry.assignment_type} {entry.license_type}")
-                
-                if len(user_entries) == 1:
-                    entry = user_entries[0]
-                    if manager.remove_user_license(user.user_id, entry.license_type, entry.assignment_type):
-                        print(f"Removed {entry.assignment_type} {entry.license_type} license")
-                else:
-                    choice = int(input("Select license to remove (1-{}): ".format(len(user_entries))))
-                    if 1 <= choice <= len(user_entries):
-                        entry = user_entries[choice - 1]
-                        
-                        if manager.remove_user_license(user.user_id, entry.license_type, entry.assignment_type):
-                            print(f"Removed {entry.assignment_type} {entry.license_type} license")
-        
-        elif choice == '5':
-            # Switch licenses
-            print("\n--- SWITCH USER LICENSE TYPE ---")
-            identifier = input("Enter user identifier: ").strip()
-            user = manager.find_user_by_identifier(identifier)
-            
-            if not user:
-                print(f"User '{identifier}' not found.")
-                continue
-            
-            user_licenses = manager.build_combined_user_license_table()
-            user_entries = user_licenses.get(user.user_id.lower(), [])
-            
-            if not user_entries:
-                print(f"User '{identifier}' has no licenses to switch.")
-                continue
-            
-            print(f"User: {user.full_name} ({user.email})")
-            print("Current licenses:")
-            for j, entry in enumerate(user_entries, 1):
-                print(f"  {j}. {entry.assignment_type} {entry.license_type}")
-            
-            old_choice = int(input("Select license to switch from (1-{}): ".format(len(user_entries))))
-            if not (1 <= old_choice <= len(user_entries)):
-                continue
-            
-            old_entry = user_entries[old_choice - 1]
-            
-            print("New license type:")
-            for j, category in enumerate(manager.license_categories.keys(), 1):
-                print(f"  {j}. {category}")
-            
-            new_license_choice = int(input("Select new license type (1-5): ").strip())
-            new_license_type = list(manager.license_categories.keys())[new_license_choice - 1]
-            
-            print("New assignment type:")
-            print("  1. Named")
-            print("  2. Concurrent")
-            new_assignment_choice = int(input("Select new assignment type (1-2): ").strip())
-            new_assignment_type = manager.assignment_types[new_assignment_choice - 1]
-            
-            if manager.switch_user_license(user, old_entry.license_type, old_entry.assignment_type, 
-                                        new_license_type, new_assignment_type):
-                print(f"Switched {user.user_id} from {old_entry.assignment_type} {old_entry.license_type} to {new_assignment_type} {new_license_type}")
-        
-        elif choice == '6':
-            # Show current summary
-            print("\n--- CURRENT LICENSE SUMMARY ---")
-            user_licenses = manager.build_combined_user_license_table()
-            
-            print("Active Users with Licenses:")
-            for user_id, entries in user_licenses.items():
-                if entries:
-                    user = manager.users.get(user_id, User(user_id, user_id, ''))
-                    license_types = [f"{e.assignment_type} {e.license_type}" for e in entries if e.is_active]
-                    if license_types:
-                        print(f"  {user.full_name} ({user.email}) - {'; '.join(license_types)}")
-            
-            print("\nInactive Users with Licenses:")
-            inactive_entries = manager.find_inactive_users_with_licenses()
-            for entry in inactive_entries:
-                print(f"  {entry.user_id} - {entry.assignment_type} {entry.license_type}")
-        
-        elif choice == '7':
-            # Apply changes and generate output
-            print("\n--- APPLY CHANGES AND GENERATE OUTPUT ---")
-            
-            if not manager.changes:
-                print("No changes to apply.")
-                continue
-            
-            # Validate changes
-            errors = manager.validate_changes()
-            if errors:
-                print("Validation errors found:")
-                for error in errors:
-                    print(f"  - {error}")
-                continue
-            
-            # Show change summary
-            print(manager.generate_change_summary())
-            
-            confirm = input("\nApply these changes? (y/n): ").lower().strip()
-            if confirm != 'y':
-                print("Changes cancelled.")
-                continue
-            
-            # Generate updated configuration
-            updated_config = manager.update_license_config_text()
-            
-            # Save to file
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_filename = f"polarion_license_updated_{timestamp}.txt"
-            
-            try:
-                with open(output_filename, 'w', encoding='utf-8') as f:
-                    f.write(updated_config)
-                print(f"\nUpdated license configuration saved to: {output_filename}")
-                
-                # Also save change summary
-                summary_filename = f"polarion_license_changes_{timestamp}.txt"
-                with open(summary_filename, 'w', encoding='utf-8') as f:
-                    f.write(manager.generate_change_summary())
-                    f.write("\n\n=== UPDATED LICENSE CONFIGURATION ===\n\n")
-                    f.write(updated_config)
-                print(f"Complete change summary saved to: {summary_filename}")
-                
-            except Exception as e:
-                print(f"Error saving files: {e}")
-            
-            # Clear changes after successful application
-            manager.changes.clear()
-        
-        elif choice == '8':
-            # Database status
-            print("\n--- DATABASE STATUS ---")
-            print(manager.get_database_status())
-            
-            if manager.db_connection:
-                # Offer to refresh users
-                refresh = input("\nDo you want to refresh user data from database? (y/n): ").lower().strip()
-                if refresh == 'y':
-                    if manager.fetch_active_users():
-                        print(f"Successfully refreshed {len(manager.users)} users from database.")
-                    else:
-                        print("Failed to refresh users from database.")
-            else:
-                # Offer to load users from file
-                load_from_file = input("\nDo you want to load users from a file? (y/n): ").lower().strip()
-                if load_from_file == 'y':
-                    user_file = input("Enter path to user file (CSV/Excel): ").strip().strip('"').strip("'")
-                    if manager.load_users_from_file(user_file):
-                        print(f"Successfully loaded {len(manager.users)} users from file.")
-                    else:
-                        print("Failed to load users from file.")
-        
-        elif choice == '9':
-            # Exit
-            if manager.changes:
-                print("Warning: You have unsaved changes!")
-                save_changes = input("Save changes before exiting? (y/n): ").lower().strip()
-                if save_changes == 'y':
-                    # Apply the same logic as option 7
-                    updated_config = manager.update_license_config_text()
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    output_filename = f"polarion_license_updated_{timestamp}.txt"
-                    
-                    try:
-                        with open(output_filename, 'w', encoding='utf-8') as f:
-                            f.write(updated_config)
-                        print(f"Updated license configuration saved to: {output_filename}")
-                    except Exception as e:
-                        print(f"Error saving file: {e}")
-            
-            print("Exiting Polarion License Manager.")
-            break
-        
-        else:
+        handler = MENU_HANDLERS.get(choice)
+        if handler is None:
             print("Invalid option. Please select 1-9.")
+        elif handler(manager):
+            break
 
 if __name__ == "__main__":
     try:
         main()
     except KeyboardInterrupt:
         print("\n\nProgram interrupted by user.")
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        print(f"An error occurred: {e}")
-        print("Check the log file for details.") 
\ No newline at end of file
+    except EOFError:
+        # Scripted input (e.g. from the web application) ran out; stop like the pooled runner does
+        pass
+    except Exception:
+        # Anything else is a bug: keep the traceback in the log and exit non-zero
+        logger.exception("Unexpected error")
+        raise
@@ -14,88 +14,108 @@ Features:
 - Support for .reqifz compressed files
 """
 
-import xml.etree.ElementTree as ET
 import difflib
 import argparse
 import sys
-import os
 import zipfile
-import tempfile
-from typing import Dict, List, Tuple, Set, Any
-from dataclasses import dataclass
+from typing import Dict, List, Tuple, Set, Any, IO, Optional
 from collections import defaultdict
 import json
 
+# lxml parses and walks the tree in C; fall back to the stdlib parser when it is not installed
+try:
+    from lxml import etree as ET
+    HAS_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    HAS_LXML = False
 
-@dataclass
-class ReqIFElement:
-    """Represents a ReqIF element with its attributes and content."""
-    tag: str
-    attributes: Dict[str, str]
-    content: str
-    children: List['ReqIFElement']
-    xpath: str
+
+# Signature at the start of every ZIP (.reqifz) archive
+ZIP_MAGIC = b'PK\x03\x04'
+# Comments and processing instructions are dropped to match the stdlib parser's element tree
+ITERPARSE_OPTIONS = dict(huge_tree=True, collect_ids=False, remove_blank_text=True,
+                         remove_comments=True, remove_pis=True) if HAS_LXML else {}
+
+# Common ReqIF requirement element names
+REQ_TAGS = ['REQ-IF-REQ', 'REQ-IF-REQ-IF', 'SPEC-OBJECT', 'SPECIFICATION', 'REQUIREMENT']
+
+# Parsed element record, keyed by its xpath: (tag, text content, attribute items)
+ElementRecord = Tuple[str, str, Tuple[Tuple[str, str], ...]]
 
 
 class ReqIFComparator:
     """Main class for comparing ReqIF files."""
     
-    def __init__(self, file1: str, file2: str):
+    def __init__(self, file1: str, file2: str,
+                 source1: Optional[IO[bytes]] = None, source2: Optional[IO[bytes]] = None):
         self.file1 = file1
         self.file2 = file2
-        self.tree1 = None
-        self.tree2 = None
-        self.root1 = None
-        self.root2 = None
-        self.temp_files = []  # Track temporary files for cleanup
-        
-    def extract_reqif_from_zip(self, zip_path: str) -> str:
-        """Extract ReqIF XML file from .reqifz archive."""
+        # Already-open binary handles for file1/file2; parsed instead of reopening the paths
+        self.source1 = source1
+        self.source2 = source2
+        self.elements1 = None
+        self.elements2 = None
+        self.requirements1 = None
+        self.requirements2 = None
+        self._open_streams = []  # Files, archives and archive members to close after parsing
+        # Comparison results, computed once and shared by the text report and the JSON output
+        self._structure_cache = None
+        self._content_cache = None
+        self._requirements_cache = None
+        
+    def open_reqif_archive(self, zip_path: str, source: IO[bytes]) -> IO[bytes]:
+        """Open the ReqIF XML member of an already-open .reqifz archive for streaming."""
         try:
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                # Look for .reqif or .xml files in the archive
-                reqif_files = [f for f in zip_ref.namelist() if f.endswith(('.reqif', '.xml'))]
-                
-                if not reqif_files:
-                    raise ValueError(f"No ReqIF XML files found in {zip_path}")
-                
-                # Use the first ReqIF file found
-                reqif_file = reqif_files[0]
-                
-                # Create temporary file
-                temp_file = tempfile.NamedTemporaryFile(mode='w+b', suffix='.reqif', delete=False)
-                self.temp_files.append(temp_file.name)
-                
-                # Extract and write to temporary file
-                with zip_ref.open(reqif_file) as source:
-                    temp_file.write(source.read())
-                    temp_file.close()
-                
-                return temp_file.name
-                
+            zip_ref = zipfile.ZipFile(source, 'r')
+            self._open_streams.append(zip_ref)
+            
+            # Look for .reqif or .xml files in the archive
+            reqif_files = [f for f in zip_ref.namelist() if f.endswith(('.reqif', '.xml'))]
+            
+            if not reqif_files:
+                raise ValueError(f"No ReqIF XML files found in {zip_path}")
+            
+            # Use the first ReqIF file found; it is decompressed as the parser reads it
+            member = zip_ref.open(reqif_files[0])
+            self._open_streams.append(member)
+            return member
+            
         except zipfile.BadZipFile:
             raise ValueError(f"{zip_path} is not a valid ZIP file")
         except Exception as e:
             raise ValueError(f"Error extracting from {zip_path}: {e}")
     
-    def get_reqif_file_path(self, file_path: str) -> str:
-        """Get the actual ReqIF XML file path, handling both .reqif and .reqifz files."""
-        if file_path.lower().endswith('.reqifz'):
-            return self.extract_reqif_from_zip(file_path)
-        else:
-            return file_path
+    def open_reqif_source(self, file_path: str, source: Optional[IO[bytes]] = None) -> IO[bytes]:
+        """Open the ReqIF XML of a file for parsing, optionally from an already-open binary source."""
+        # Open the file once so the signature check, the archive reader and the parser share one handle
+        if source is None:
+            source = open(file_path, 'rb')
+            self._open_streams.append(source)
+        
+        # Extension-less paths (e.g. /proc/<pid>/fd/<n>) are recognised by their ZIP signature
+        is_archive = file_path.lower().endswith('.reqifz') or source.read(4) == ZIP_MAGIC
+        source.seek(0)
+        if is_archive:
+            return self.open_reqif_archive(file_path, source)
+        return source
         
     def load_files(self) -> bool:
         """Load and parse both ReqIF files."""
+        # Both files were already parsed (e.g. by the report before saving JSON results)
+        if self.elements1 is not None and self.elements2 is not None:
+            return True
+        
         try:
-            # Handle .reqifz files
-            reqif_file1 = self.get_reqif_file_path(self.file1)
-            reqif_file2 = self.get_reqif_file_path(self.file2)
+            # Handle .reqifz files; handles passed in are only used once, a retry reopens the paths
+            source1, source2 = self.source1, self.source2
+            self.source1 = self.source2 = None
+            self._open_streams.extend(source for source in (source1, source2) if source is not None)
+            reqif_source1 = self.open_reqif_source(self.file1, source1)
+            reqif_source2 = self.open_reqif_source(self.file2, source2)
             
-            self.tree1 = ET.parse(reqif_file1)
-            self.tree2 = ET.parse(reqif_file2)
-            self.root1 = self.tree1.getroot()
-            self.root2 = self.tree2.getroot()
+            self.elements1, self.requirements1 = self.parse_reqif_file(reqif_source1)
+            self.elements2, self.requirements2 = self.parse_reqif_file(reqif_source2)
             return True
         except ET.ParseError as e:
             print(f"Error parsing XML file: {e}")
@@ -106,60 +126,103 @@ class ReqIFComparator:
         except ValueError as e:
             print(f"Error processing file: {e}")
             return False
+        finally:
+            # Everything has been recorded, so the inputs are no longer needed
+            self.close_streams()
     
-    def cleanup_temp_files(self):
-        """Clean up temporary files created during processing."""
-        for temp_file in self.temp_files:
+    def close_streams(self):
+        """Close the files and archives opened for parsing."""
+        # Close archive members before their archive, and archives before the file underneath
+        for stream in reversed(self._open_streams):
             try:
-                os.unlink(temp_file)
+                stream.close()
             except Exception:
                 pass  # Ignore cleanup errors
-        self.temp_files.clear()
+        self._open_streams.clear()
     
-    def extract_elements(self, root: ET.Element, xpath: str = "") -> List[ReqIFElement]:
-        """Extract all elements from the XML tree with their attributes and content."""
-        elements = []
-        
-        for child in root:
-            current_xpath = f"{xpath}/{child.tag}" if xpath else child.tag
-            
-            # Get attributes
-            attributes = {k: v for k, v in child.attrib.items()}
-            
-            # Get text content
-            content = child.text.strip() if child.text else ""
-            
-            # Recursively get children
-            children = self.extract_elements(child, current_xpath)
+    def parse_reqif_file(self, reqif_file: IO[bytes]) -> Tuple[Dict[str, ElementRecord], List[Dict[str, Any]]]:
+        """Stream-parse a ReqIF file into element records keyed by xpath and its requirement elements.
+        
+        Elements are cleared as soon as they have been recorded, so memory stays
+        proportional to the document depth rather than its size. When several
+        elements share an xpath the last one is kept.
+        """
+        elements = {}
+        requirements = []
+        # (xpath relative to the root, tag, requirement record) for every open element
+        open_elements = []
+        # (parent xpath, tag) -> xpath, so repeated siblings share one interned string
+        xpath_cache = {}
+        # tag -> whether it names a requirement element; ReqIF has only a handful of distinct tags
+        requirement_tags = {}
+        root_tag = None
+        
+        for event, elem in ET.iterparse(reqif_file, events=('start', 'end'), **ITERPARSE_OPTIONS):
+            if event == 'start':
+                # Requirements are created on start so the list keeps document order
+                tag = sys.intern(elem.tag)
+                if root_tag is None:
+                    root_tag = tag
+                    xpath = ""
+                else:
+                    parent_xpath, _, parent_requirement = open_elements[-1]
+                    xpath = xpath_cache.get((parent_xpath, tag))
+                    if xpath is None:
+                        xpath = sys.intern(f"{parent_xpath}/{tag}") if parent_xpath else tag
+                        xpath_cache[(parent_xpath, tag)] = xpath
+                    if parent_requirement is not None:
+                        parent_requirement['children'].append(tag)
+                
+                is_requirement = requirement_tags.get(tag)
+                if is_requirement is None:
+                    upper_tag = tag.upper()
+                    is_requirement = requirement_tags[tag] = any(req_tag in upper_tag for req_tag in REQ_TAGS)
+                
+                requirement = None
+                if is_requirement:
+                    requirement = {
+                        'tag': tag,
+                        'xpath': f"/{root_tag}/{xpath}" if xpath else f"/{root_tag}",
+                        'attributes': dict(elem.attrib),
+                        'content': "",
+                        'children': []
+                    }
+                    requirements.append(requirement)
+                
+                open_elements.append((xpath, tag, requirement))
+                continue
             
-            element = ReqIFElement(
-                tag=child.tag,
-                attributes=attributes,
-                content=content,
-                children=children,
-                xpath=current_xpath
-            )
-            elements.append(element)
+            # Text is only complete once the element has ended
+            xpath, tag, requirement = open_elements.pop()
+            content = elem.text.strip() if elem.text else ""
+            # The root itself is not part of the element records
+            if open_elements:
+                elements[xpath] = (tag, content, tuple(elem.attrib.items()))
+            if requirement is not None:
+                requirement['content'] = content
             
-            # Add children to the list
-            elements.extend(children)
+            # Everything needed from this element has been recorded; drop it and its finished siblings
+            elem.clear()
+            if HAS_LXML:
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
         
-        return elements
+        return elements, requirements
     
     def compare_structure(self) -> Dict[str, Any]:
         """Compare the structure of both ReqIF files."""
-        elements1 = self.extract_elements(self.root1)
-        elements2 = self.extract_elements(self.root2)
+        if self._structure_cache is not None:
+            return self._structure_cache
         
-        # Get unique tags
-        tags1 = {elem.tag for elem in elements1}
-        tags2 = {elem.tag for elem in elements2}
+        # Get unique tags (elements sharing an xpath share its last tag)
+        tags1 = {tag for tag, _, _ in self.elements1.values()}
+        tags2 = {tag for tag, _, _ in self.elements2.values()}
         
         # Get unique xpaths
-        xpaths1 = {elem.xpath for elem in elements1}
-        xpaths2 = {elem.xpath for elem in elements2}
+        xpaths1 = set(self.elements1)
+        xpaths2 = set(self.elements2)
         
-        return {
+        self._structure_cache = {
             'tags_only_in_file1': tags1 - tags2,
             'tags_only_in_file2': tags2 - tags1,
             'common_tags': tags1 & tags2,
@@ -167,15 +230,16 @@ class ReqIFComparator:
             'xpaths_only_in_file2': xpaths2 - xpaths1,
             'common_xpaths': xpaths1 & xpaths2
         }
+        return self._structure_cache
     
     def compare_content(self) -> Dict[str, Any]:
         """Compare the content of both ReqIF files."""
-        elements1 = self.extract_elements(self.root1)
-        elements2 = self.extract_elements(self.root2)
+        if self._content_cache is not None:
+            return self._content_cache
         
-        # Create dictionaries for easy lookup
-        elements1_dict = {elem.xpath: elem for elem in elements1}
-        elements2_dict = {elem.xpath: elem for elem in elements2}
+        # Elements are already keyed by xpath for lookup
+        elements1_dict = self.elements1
+        elements2_dict = self.elements2
         
         differences = {
             'content_differences': [],
@@ -184,78 +248,55 @@ class ReqIFComparator:
             'extra_elements': []
         }
         
+        # dict key views support set operations directly, so no intermediate sets are built
+        xpaths1 = elements1_dict.keys()
+        xpaths2 = elements2_dict.keys()
+        
         # Compare common elements
-        common_xpaths = set(elements1_dict.keys()) & set(elements2_dict.keys())
+        common_xpaths = xpaths1 & xpaths2
         
         for xpath in common_xpaths:
-            elem1 = elements1_dict[xpath]
-            elem2 = elements2_dict[xpath]
+            _, content1, attributes1 = elements1_dict[xpath]
+            _, content2, attributes2 = elements2_dict[xpath]
             
             # Compare content
-            if elem1.content != elem2.content:
+            if content1 != content2:
                 differences['content_differences'].append({
                     'xpath': xpath,
-                    'file1_content': elem1.content,
-                    'file2_content': elem2.content
+                    'file1_content': content1,
+                    'file2_content': content2
                 })
             
-            # Compare attributes
-            if elem1.attributes != elem2.attributes:
+            # Compare attributes (the same attributes may be written in a different order)
+            if attributes1 != attributes2 and dict(attributes1) != dict(attributes2):
                 differences['attribute_differences'].append({
                     'xpath': xpath,
-                    'file1_attributes': elem1.attributes,
-                    'file2_attributes': elem2.attributes
+                    'file1_attributes': dict(attributes1),
+                    'file2_attributes': dict(attributes2)
                 })
         
         # Find missing and extra elements
-        differences['missing_elements'] = list(set(elements2_dict.keys()) - set(elements1_dict.keys()))
-        differences['extra_elements'] = list(set(elements1_dict.keys()) - set(elements2_dict.keys()))
+        differences['missing_elements'] = list(xpaths2 - xpaths1)
+        differences['extra_elements'] = list(xpaths1 - xpaths2)
         
+        self._content_cache = differences
         return differences
     
     def compare_requirements(self) -> Dict[str, Any]:
         """Specifically compare requirements between the two files."""
-        # Look for requirement-related elements
-        req_elements1 = self.find_requirement_elements(self.root1)
-        req_elements2 = self.find_requirement_elements(self.root2)
+        if self._requirements_cache is not None:
+            return self._requirements_cache
         
-        return {
+        # Requirement-related elements are collected while the files are parsed
+        req_elements1 = self.requirements1
+        req_elements2 = self.requirements2
+        
+        self._requirements_cache = {
             'requirements_file1': req_elements1,
             'requirements_file2': req_elements2,
             'requirement_differences': self.compare_requirement_lists(req_elements1, req_elements2)
         }
-    
-    def find_requirement_elements(self, root: ET.Element) -> List[Dict[str, Any]]:
-        """Find all requirement-related elements in the XML tree."""
-        requirements = []
-        
-        # Common ReqIF requirement element names
-        req_tags = ['REQ-IF-REQ', 'REQ-IF-REQ-IF', 'SPEC-OBJECT', 'SPECIFICATION', 'REQUIREMENT']
-        
-        for elem in root.iter():
-            if any(req_tag in elem.tag.upper() for req_tag in req_tags):
-                req_info = {
-                    'tag': elem.tag,
-                    'xpath': self.get_xpath(elem),
-                    'attributes': elem.attrib,
-                    'content': elem.text.strip() if elem.text else "",
-                    'children': [child.tag for child in elem]
-                }
-                requirements.append(req_info)
-        
-        return requirements
-    
-    def get_xpath(self, element: ET.Element) -> str:
-        """Get the XPath of an element."""
-        path_parts = []
-        current = element
-        
-        while current is not None:
-            if current.tag:
-                path_parts.append(current.tag)
-            current = current.getparent() if hasattr(current, 'getparent') else None
-        
-        return '/' + '/'.join(reversed(path_parts))
+        return self._requirements_cache
     
     def compare_requirement_lists(self, reqs1: List[Dict], reqs2: List[Dict]) -> Dict[str, Any]:
         """Compare two lists of requirements."""
@@ -362,17 +403,19 @@ def main():
     
     args = parser.parse_args()
     
-    # Check if files exist
-    if not os.path.exists(args.file1):
-        print(f"Error: File '{args.file1}' not found.")
-        sys.exit(1)
-    
-    if not os.path.exists(args.file2):
-        print(f"Error: File '{args.file2}' not found.")
-        sys.exit(1)
+    # Open each file once; this doubles as the existence check and the comparator parses these handles
+    sources = []
+    for file_path in (args.file1, args.file2):
+        try:
+            sources.append(open(file_path, 'rb'))
+        except FileNotFoundError:
+            for source in sources:
+                source.close()
+            print(f"Error: File '{file_path}' not found.")
+            sys.exit(1)
     
     # Create comparator
-    comparator = ReqIFComparator(args.file1, args.file2)
+    comparator = ReqIFComparator(args.file1, args.file2, *sources)
     
     try:
         # Generate and display report
@@ -395,8 +438,8 @@ def main():
                 print(f"Failed to save text report: {e}")
     
     finally:
-        # Always cleanup temporary files
-        comparator.cleanup_temp_files()
+        # Always close the parsed files
+        comparator.close_streams()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Test script for the web application
+
+This script runs the local tools through the web app's executor, both on
+the pre-warmed worker pools and through the subprocess fallback.
+"""
+
+import io
+import sys
+import os
+import re
+import shutil
+import tempfile
+import contextlib
+from werkzeug.datastructures import FileStorage
+import app
+from test_reqif_comparator import create_sample_reqifz_files
+
+@contextlib.contextmanager
+def local_tool(tool_id, script_name, pool_size):
+    """Point one of the web app's tools at this checkout, run from a scratch directory"""
+    work_dir = tempfile.mkdtemp()
+    tool_config = app.TOOLS_CONFIG[tool_id]
+    saved_config, saved_pool_size = dict(tool_config), app.TOOL_POOL_SIZE
+    tool_config.update(
+        script_path=os.path.join(os.path.dirname(os.path.abspath(__file__)), script_name),
+        venv_path=sys.executable,
+        cwd=work_dir
+    )
+    app.TOOL_POOL_SIZE = pool_size
+    try:
+        app.init_tool_pools()
+        yield work_dir
+    finally:
+        pool = app._tool_pools.pop(tool_id, None)
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        tool_config.clear()
+        tool_config.update(saved_config)
+        app.TOOL_POOL_SIZE = saved_pool_size
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def local_license_tool(pool_size):
+    """Point the web app's license tool at this checkout, run from a scratch directory"""
+    return local_tool('license_management', 'polarion_license_manager.py', pool_size)
+
+SAMPLE_WEB_CONFIG = """# NAMED USERS:
+namedALMUser1=bshrager
+namedALMUser2=bshrager
+"""
+
+def read_output(result):
+    """Read (and remove) the output file a tool run handed back"""
+    with open(result.pop('output_path'), encoding='utf-8') as output_file:
+        output = output_file.read()
+    os.unlink(output_file.name)
+    return output
+
+def run_license_summary(pool_size):
+    """Run the 'summary' action through the web app, pooled (pool_size > 0) or as a subprocess"""
+    with local_license_tool(pool_size) as work_dir:
+        result = app.ToolExecutor.execute_license_management(SAMPLE_WEB_CONFIG, None, 'summary')
+        result['output'] = read_output(result)
+        result['log_written'] = os.path.exists(os.path.join(work_dir, 'polarion_license_manager.log'))
+    return result
+
+def comparable_lines(output):
+    """Output lines without timestamps; sorted, as the background parse may log out of order"""
+    output = re.sub(r'polarion_license_backup_\d+_\d+', 'polarion_license_backup_<time>', output)
+    return sorted(re.sub(r'^\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d+ - ', '', line) for line in output.splitlines())
+
+def check_license_summary(result):
+    """Assert on the output every execution mode must produce for run_license_summary"""
+    assert result['success'], result['error']
+    assert 'POLARION LICENSE MANAGEMENT AUTOMATION TOOL' in result['output']
+    # Tool log lines must reach the captured output, not just the server console
+    assert 'INFO - Parsed 2 active license entries' in result['output']
+    assert 'INFO - Backup created: polarion_license_backup_' in result['output']
+    assert result['output'].rstrip().endswith('Exiting Polarion License Manager.')
+    assert result['log_written']
+
+def test_web_execution_subprocess():
+    """The subprocess fallback runs the tool and captures its prints and log lines"""
+    check_license_summary(run_license_summary(0))
+
+def test_web_execution_pooled():
+    """A pre-warmed pool worker runs the tool and captures its prints and log lines"""
+    check_license_summary(run_license_summary(1))
+
+def test_web_execution_pooled_matches_subprocess():
+    """Pooled and subprocess runs of the same action show the user the same output"""
+    pooled, subprocess_run = run_license_summary(1), run_license_summary(0)
+    assert pooled['success'] and subprocess_run['success']
+    assert 'Parsed 2 active license entries' in pooled['output']
+    assert comparable_lines(pooled['output']) == comparable_lines(subprocess_run['output'])
+    assert pooled['error'] == subprocess_run['error']
+    assert pooled['log_written'] and subprocess_run['log_written']
+
+def test_web_execution_exit_status_and_stdin():
+    """SystemExit codes and exhausted scripted stdin behave the same pooled and as a subprocess"""
+    for pool_size in (1, 0):
+        with local_license_tool(pool_size):
+            # argparse exits with status 2 on an unknown option
+            result = app.ToolExecutor.run_tool('license_management', ['--no-such-option'])
+            assert result['returncode'] == 2
+            read_output(result)
+            assert 'unrecognized arguments: --no-such-option' in result['stderr']
+            
+            # Stdin ends before the menu's exit option; the tool stops cleanly
+            result = app.ToolExecutor.run_tool('license_management', ['--config-file', os.devnull], b"n\nn\n")
+            assert result['returncode'] == 0
+            assert 'LICENSE CONFIGURATION INPUT' in read_output(result)
+
+def test_web_execution_pool_failure_falls_back():
+    """A pooled job that times out, or a pool that is gone, is rerun as a subprocess"""
+    saved_timeout = app.TOOL_JOB_TIMEOUT
+    try:
+        with local_license_tool(1) as work_dir:
+            app.TOOL_JOB_TIMEOUT = 0
+            result = app.ToolExecutor.execute_license_management(SAMPLE_WEB_CONFIG, None, 'summary')
+            result['output'] = read_output(result)
+            result['log_written'] = os.path.exists(os.path.join(work_dir, 'polarion_license_manager.log'))
+            check_license_summary(result)
+        
+        app.TOOL_JOB_TIMEOUT = saved_timeout
+        with local_license_tool(1) as work_dir:
+            pool = app.get_tool_pool('license_management')
+            pool.terminate()
+            pool.join()
+            result = app.ToolExecutor.execute_license_management(SAMPLE_WEB_CONFIG, None, 'summary')
+            result['output'] = read_output(result)
+            result['log_written'] = os.path.exists(os.path.join(work_dir, 'polarion_license_manager.log'))
+            check_license_summary(result)
+    finally:
+        app.TOOL_JOB_TIMEOUT = saved_timeout
+
+def report_without_paths(output):
+    """Report lines minus the File 1/File 2 headers naming the inputs; sorted and unnumbered,
+    as differences are listed in set order, which varies between processes"""
+    return sorted(re.sub(r'^\d+\. ', '', line) for line in output.splitlines() if not re.match(r'File [12]: ', line))
+
+def test_reqif_comparison_on_memfd_uploads():
+    """Uploads staged in memfds are compared through their /proc paths, pooled and as a subprocess"""
+    if not app.MEMFD_STAGING:
+        print("memfd staging is not available on this platform, skipping")
+        return
+    
+    reqifz_paths = create_sample_reqifz_files()
+    try:
+        for pool_size in (1, 0):
+            with local_tool('reqif_comparison', 'reqif_comparator.py', pool_size):
+                # The same comparison straight from the files on disk
+                result = app.ToolExecutor.execute_reqif_comparison(*reqifz_paths)
+                assert result['success'], result['error']
+                expected = report_without_paths(read_output(result))
+                
+                staged = []
+                try:
+                    for index, path in enumerate(reqifz_paths, 1):
+                        with open(path, 'rb') as f:
+                            upload = FileStorage(io.BytesIO(f.read()), os.path.basename(path))
+                        staged.append(app.upload_to_memfd(upload, f"reqif{index}"))
+                        assert staged[-1] is not None
+                        assert staged[-1][1].startswith('/proc/')
+                    result = app.ToolExecutor.execute_reqif_comparison(staged[0][1], staged[1][1])
+                finally:
+                    for fd, _ in filter(None, staged):
+                        os.close(fd)
+                
+                assert result['success'], result['error']
+                output = read_output(result)
+                assert 'REQIF FILE COMPARISON REPORT' in output
+                assert 'Content differences: 3' in output
+                assert report_without_paths(output) == expected
+    finally:
+        for path in reqifz_paths:
+            os.unlink(path)
+
+def save_upload(stream, expected):
+    """Save an upload stream with zero_copy_save and check the file holds exactly the upload."""
+    fd, path = tempfile.mkstemp(suffix='.reqifz')
+    os.close(fd)
+    try:
+        app.zero_copy_save(FileStorage(stream, 'upload.reqifz'), path)
+        with open(path, 'rb') as saved:
+            assert saved.read() == expected
+    finally:
+        os.unlink(path)
+
+def test_zero_copy_save_in_memory_uploads():
+    """Uploads still held in memory are saved without needing a file descriptor."""
+    data = b'PK\x03\x04' + os.urandom(64 * 1024)
+    
+    save_upload(io.BytesIO(data), data)
+    
+    # A SpooledTemporaryFile still in memory (fileno() rolls it over first)
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    spool.write(data)
+    save_upload(spool, data)
+    spool.close()
+    
+    # Any other stream without a usable fileno() takes the buffered copy
+    save_upload(io.BufferedReader(io.BytesIO(data)), data)
+
+def test_zero_copy_save_rolled_upload():
+    """Uploads Werkzeug has spilled to disk are copied from their file descriptor."""
+    data = b'PK\x03\x04' + os.urandom(3 * 1024 * 1024)
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    spool.write(data)
+    save_upload(spool, data)
+    spool.close()
+    
+    with tempfile.TemporaryFile() as on_disk:
+        on_disk.write(data)
+        save_upload(on_disk, data)
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("WEB APPLICATION - TEST SCRIPT")
+    print("=" * 60)
+    
+    test_web_execution_subprocess()
+    test_web_execution_pooled()
+    test_web_execution_pooled_matches_subprocess()
+    test_web_execution_exit_status_and_stdin()
+    test_web_execution_pool_failure_falls_back()
+    test_reqif_comparison_on_memfd_uploads()
+    test_zero_copy_save_in_memory_uploads()
+    test_zero_copy_save_rolled_upload()
+    
+    print("\nTest completed!")
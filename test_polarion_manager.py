@@ -68,7 +68,7 @@ concurrentQAUser1=bshrager"""
         
         # Test user license querying
         print("\n4. Testing user license querying...")
-        results = manager.query_user_licenses(['bshrager', 'uhizi', 'asegal1'])
+        results, stats = manager.query_user_licenses(['bshrager', 'uhizi', 'asegal1'])
         
         for result in results:
             print(f"  {result['message']}")
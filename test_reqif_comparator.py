@@ -142,7 +142,7 @@ def test_reqif_comparator():
     print(report)
     
     # Clean up
-    comparator.cleanup_temp_files()
+    comparator.close_streams()
     try:
         os.unlink(file1)
         os.unlink(file2)
@@ -169,7 +169,7 @@ def test_reqif_comparator():
     print(report_z)
     
     # Clean up
-    comparator_z.cleanup_temp_files()
+    comparator_z.close_streams()
     try:
         os.unlink(reqifz1)
         os.unlink(reqifz2)